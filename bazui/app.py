@@ -1,7 +1,11 @@
+from contextlib import nullcontext
 import pygame
 from bazui.state_manager import StateManager
 from bazui.app_state import AppState
 from bazui.library import ImageLibrary
+from bazui.disk_cache import DiskImageCache
+from bazui.frame_scheduler import FrameScheduler
+from bazui.profiler import FrameProfiler
 
 class App:
     def __init__(self, app_state=None):
@@ -13,17 +17,64 @@ class App:
         self.clock = pygame.time.Clock()
         self.running = True
         self.state_manager = StateManager(self)
-        self.library = ImageLibrary()  # Library for storing images
+        disk_cache = None
+        if self.app_state.image_disk_cache_dir is not None:
+            disk_cache = DiskImageCache(self.app_state.image_disk_cache_dir, self.app_state.image_disk_cache_max_bytes)
+        self.library = ImageLibrary(workers=self.app_state.image_loader_workers,
+                                    max_bytes=self.app_state.image_library_max_bytes,
+                                    mipmaps=self.app_state.image_mipmaps,
+                                    atlas=self.app_state.image_atlas,
+                                    disk_cache=disk_cache)  # Library for storing images
+        self.scheduler = FrameScheduler(self.clock, self.app_state.min_fps, self.app_state.max_fps)
+        if self.app_state.frame_pacing:
+            # finished background loads wake the loop up
+            self.library.loaded_event = pygame.event.custom_type()
+        self._caption = None
+        self.profiler = None
+        if self.app_state.profiling:
+            self.profiler = FrameProfiler(self.app_state.profiler_history)
+            self.profiler.install()
 
     def run(self):
         while self.running:
-            self.update()
-            self.state_manager.handle_events()
-            self.state_manager.update()
-            self.state_manager.draw(self.screen)
-            pygame.display.flip()
-            fps = self.clock.tick(60)
-            pygame.display.set_caption(f"FPS: {1/fps*1000:.2f}")
+            if self.profiler is not None:
+                self.profiler.begin_frame()
+            with self.phase("handle_events"):
+                self.update()
+                self.state_manager.handle_events()
+            with self.phase("update"):
+                self.state_manager.update()
+            with self.phase("draw"):
+                dirty_rects = self.state_manager.draw(self.screen)
+                if self.profiler is not None:
+                    overlay_rect = self.profiler.draw_overlay(self.screen)
+                    if overlay_rect is not None and dirty_rects is not None:
+                        dirty_rects.append(overlay_rect)
+            with self.phase("flip"):
+                if dirty_rects is None:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(dirty_rects)
+            with self.phase("wait"):
+                self.wait_next_frame()
+            if self.profiler is not None:
+                self.profiler.end_frame(self.app_state.frame_mode if self.app_state.frame_pacing else None)
+
+    def phase(self, name):
+        """Return a context timing a phase of the frame when profiling."""
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def wait_next_frame(self):
+        """Wait until the next frame: a fixed max_fps rate, or with frame_pacing, as late as the widgets allow."""
+        if self.app_state.frame_pacing:
+            self.app_state.frame_mode = self.scheduler.wait(self.state_manager.next_frame_delay())
+            caption = f"FPS: {self.clock.get_fps():.1f} ({self.app_state.frame_mode})"
+        else:
+            self.clock.tick(self.app_state.max_fps)
+            caption = f"FPS: {self.clock.get_fps():.1f}"
+        if caption != self._caption:
+            self._caption = caption
+            pygame.display.set_caption(caption)
 
     def quit(self, widget):
         self.running = False
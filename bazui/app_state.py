@@ -1,5 +1,7 @@
+from bazui.ui.link import Observable
 
-class AppState:
+
+class AppState(Observable):
     """Global application state. Defaults here."""
     def __init__(self):
         self.screen_size = (800, 600)
@@ -10,9 +12,27 @@ class AppState:
         self.undo_stack_max_size = 20
         self.redo_stack_max_size = 20
         self.max_move_click_distance = 10
+        self.dirty_rendering = False  # repaint only invalidated areas instead of the whole screen
+        self.spatial_index = False  # route positional events through a spatial index of widget rects
+        self.spatial_index_cell_size = 64
+        self.focus_routing = False  # deliver keyboard events to the selected widget and its ancestors only
+        self.event_coalescing = False  # collapse the redundant mouse motion and resize events of each frame
+        self.merge_key_repeat = False  # with event_coalescing, also collapse bursts of repeated key presses
+        self.frame_pacing = False  # sleep on the event queue while no widget needs a new frame
+        self.min_fps = 1  # with frame_pacing, frame rate kept while idle (0 to sleep until an event)
+        self.max_fps = 60
+        self.profiling = False  # time the frame phases and the widgets (see bazui.profiler), F3 shows the results
+        self.profiler_history = 300  # number of frames kept by the profiler
+        self.image_loader_workers = 2  # number of threads decoding images in the background
+        self.image_library_max_bytes = None  # memory budget of the image library (None for unlimited)
+        self.image_mipmaps = False  # build half size levels of loaded images for cheaper downscaling
+        self.image_atlas = False  # pack small images into shared atlas surfaces
+        self.image_disk_cache_dir = None  # directory of the decoded images cache (None to disable it)
+        self.image_disk_cache_max_bytes = 256 * 1024 * 1024
 
         # states
         self.dragged_widget = None
         self.mouse_pos = (0, 0)
         self.clicked_widget = None
         self.clicked_widget_pos = (0, 0)
+        self.frame_mode = "active"  # with frame_pacing, pacing mode of the last frame (see frame_scheduler)
@@ -0,0 +1,103 @@
+import pygame
+from bazui.surfaces import allocated
+
+
+class AtlasPage:
+    """One atlas surface, filled with shelves: rows of images packed from left to right."""
+    def __init__(self, size, padding):
+        self.surface = allocated(pygame.Surface(size, pygame.SRCALPHA))
+        self.padding = padding
+        self.shelves = []  # [y, height, x of the next free spot]
+        self.used_area = 0
+
+    def pack(self, size):
+        """Find room for an image.
+
+        Args:
+            size (tuple[int, int]): The size of the image.
+
+        Returns:
+            pygame.Rect | None: The area given to the image, None if the page is full.
+        """
+
+        width, height = size[0] + self.padding, size[1] + self.padding
+        page_width, page_height = self.surface.get_size()
+
+        # best fit: the lowest shelf high enough with room left
+        best = None
+        for shelf in self.shelves:
+            if shelf[1] >= height and shelf[2] + width <= page_width:
+                if best is None or shelf[1] < best[1]:
+                    best = shelf
+        if best is None:
+            top = self.shelves[-1][0] + self.shelves[-1][1] if self.shelves else 0
+            if top + height > page_height or width > page_width:
+                return None
+            best = [top, height, 0]
+            self.shelves.append(best)
+
+        rect = pygame.Rect(best[2], best[0], *size)
+        best[2] += width
+        self.used_area += size[0] * size[1]
+        return rect
+
+    @property
+    def occupancy(self)-> float:
+        return self.used_area / (self.surface.get_width() * self.surface.get_height())
+
+
+class TextureAtlas:
+    """Packs small images into a few large surfaces, so that they can be drawn
+    with a single Surface.blits call. Images are added incrementally."""
+    def __init__(self, page_size=(1024, 1024), max_image_size=64, padding=1):
+        self.page_size = page_size
+        self.max_image_size = max_image_size  # larger images are not packed
+        self.padding = padding  # free pixels between images
+        self.pages = []
+        self.regions = {}  # name -> (page index, rect)
+
+    def accepts(self, image: pygame.Surface)-> bool:
+        return image.get_width() <= self.max_image_size and image.get_height() <= self.max_image_size
+
+    def add(self, name, image: pygame.Surface):
+        """Pack an image in the atlas.
+
+        Args:
+            name (str): The name of the image.
+            image (pygame.Surface): The image.
+
+        Returns:
+            pygame.Surface | None: A subsurface of the atlas holding the image, None if it is too large.
+        """
+
+        if not self.accepts(image):
+            return None
+        for page_idx, page in enumerate(self.pages):
+            rect = page.pack(image.get_size())
+            if rect is not None:
+                break
+        else:
+            page_idx = len(self.pages)
+            page = AtlasPage(self.page_size, self.padding)
+            self.pages.append(page)
+            rect = page.pack(image.get_size())
+
+        page.surface.blit(image, rect)
+        self.regions[name] = (page_idx, rect)
+        return page.surface.subsurface(rect)
+
+    def remove(self, name):
+        """Forget an image. Its area is not reused."""
+        self.regions.pop(name, None)
+
+    def region(self, name):
+        """Return the atlas page surface and the area of an image, None if the image is not packed."""
+        region = self.regions.get(name)
+        if region is None:
+            return None
+        return self.pages[region[0]].surface, region[1]
+
+    def stats(self)-> dict:
+        return {"pages": len(self.pages), "images": len(self.regions),
+                "bytes": sum(page.surface.get_pitch() * page.surface.get_height() for page in self.pages),
+                "occupancy": [page.occupancy for page in self.pages]}
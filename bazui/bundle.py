@@ -0,0 +1,68 @@
+import io
+import mmap
+import os
+import struct
+import zipfile
+import pygame
+
+LOCAL_HEADER = struct.Struct("<4s22xHH")  # signature, ..., file name length, extra field length
+
+
+class AssetBundle:
+    """Many assets packed in one zip file, opened once. Members stored without compression
+    are read straight from a memory map of the file, compressed ones through zipfile."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._zip = zipfile.ZipFile(self._file)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = {info.filename: info for info in self._zip.infolist() if not info.is_dir()}  # name -> ZipInfo
+
+    def names(self, prefix=""):
+        """Return the names of the assets starting with a prefix."""
+        return [name for name in self.index if name.startswith(prefix)]
+
+    def read(self, name)-> bytes:
+        """Return the content of an asset.
+
+        Raises:
+            KeyError: If the bundle has no asset with this name.
+        """
+
+        info = self.index[name]
+        if info.compress_type != zipfile.ZIP_STORED:
+            return self._zip.read(info)
+        signature, name_length, extra_length = LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+        if signature != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"Bad local header for {name} in {self.path}")
+        start = info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+        return self._map[start:start + info.file_size]
+
+    def load_image(self, name)-> pygame.Surface:
+        """Decode an image asset."""
+        return pygame.image.load(io.BytesIO(self.read(name)), name)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def close(self):
+        self._map.close()
+        self._zip.close()
+        self._file.close()
+
+
+def pack_bundle(files, bundle_path):
+    """Write assets into a bundle file. Images are stored without compression
+    (they are already compressed), so that they can be memory mapped.
+
+    Args:
+        files (dict[str, str] | Iterable[str]): Asset names mapped to their file paths,
+            or file paths, named after their base name.
+        bundle_path (str): The bundle file to write.
+    """
+
+    if not isinstance(files, dict):
+        files = {os.path.basename(path): path for path in files}
+    with zipfile.ZipFile(bundle_path, "w", compression=zipfile.ZIP_STORED) as bundle:
+        for name, path in files.items():
+            bundle.write(path, name)
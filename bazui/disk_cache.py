@@ -0,0 +1,149 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import pygame
+from bazui.surfaces import allocated
+
+MAGIC = b"BZIC"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")  # magic, version, width, height
+
+
+class DiskImageCache:
+    """Stores decoded images as raw RGBA files, loaded back through a memory map without
+    any decoding. Entries are keyed by source path, modification time and size, so a
+    modified source never hits a stale entry. The least recently used entries are
+    deleted when the cache grows over its size limit. The cache can be used by several
+    loader threads."""
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # guards the size accounting and pruning
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".raw"))
+
+    def entry_path(self, source_path, variant=None):
+        """Return the cache file of an image.
+
+        Args:
+            source_path (str): The file the image comes from.
+            variant (str, optional): Distinguishes several images derived from the same file
+                (e.g. scaled versions). Defaults to None.
+
+        Returns:
+            str | None: The cache file path, None if the source file does not exist.
+        """
+
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(source_path)}|{stat.st_mtime_ns}|{stat.st_size}|{variant}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".raw")
+
+    def load(self, source_path, variant=None):
+        """Load an image from the cache.
+
+        Args:
+            source_path (str): The file the image comes from.
+            variant (str, optional): See entry_path. Defaults to None.
+
+        Returns:
+            pygame.Surface | None: The image, None if it is not cached or the entry is invalid.
+        """
+
+        entry = self.entry_path(source_path, variant)
+        if entry is None or not os.path.exists(entry):
+            self.misses += 1
+            return None
+        try:
+            with open(entry, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, version, width, height = HEADER.unpack_from(data)
+                if magic != MAGIC or version != VERSION or len(data) != HEADER.size + width * height * 4:
+                    raise ValueError("invalid cache entry")
+                with memoryview(data)[HEADER.size:] as pixels:
+                    image = allocated(pygame.image.frombuffer(pixels, (width, height), "RGBA"))
+                    image = image.convert_alpha() if pygame.display.get_surface() else image.copy()
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Invalid image cache entry {entry}: {e}")
+            self._remove(entry)
+            self.misses += 1
+            return None
+        try:
+            os.utime(entry)  # recently used
+        except OSError:
+            pass  # pruned meanwhile
+        self.hits += 1
+        return image
+
+    def store(self, source_path, image: pygame.Surface, variant=None):
+        """Store an image in the cache.
+
+        Args:
+            source_path (str): The file the image comes from.
+            image (pygame.Surface): The decoded image.
+            variant (str, optional): See entry_path. Defaults to None.
+        """
+
+        entry = self.entry_path(source_path, variant)
+        if entry is None:
+            return
+        temp_path = None
+        try:
+            # a file of its own, other threads may be storing the same entry
+            descriptor, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            with open(descriptor, "wb") as file:
+                file.write(HEADER.pack(MAGIC, VERSION, *image.get_size()))
+                file.write(pygame.image.tobytes(image, "RGBA"))
+            os.replace(temp_path, entry)  # readers never see a partial entry
+        except OSError as e:
+            print(f"Error caching {source_path}: {e}")
+            if temp_path is not None:
+                self._remove(temp_path)
+            return
+        with self._lock:
+            self._total_bytes += HEADER.size + image.get_width() * image.get_height() * 4
+            if self._total_bytes > self.max_bytes:
+                self._prune()
+
+    def prune(self):
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            self._prune()
+
+    def _prune(self):
+        entries = []
+        for dir_entry in os.scandir(self.directory):
+            if dir_entry.name.endswith(".raw"):
+                try:
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue  # replaced meanwhile
+                entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        self._total_bytes = total
+
+    def clear(self):
+        """Delete every entry."""
+        with self._lock:
+            for dir_entry in os.scandir(self.directory):
+                if dir_entry.name.endswith(".raw"):
+                    self._remove(dir_entry.path)
+            self._total_bytes = 0
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
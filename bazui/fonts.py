@@ -0,0 +1,90 @@
+from collections import OrderedDict
+import pygame
+from bazui.surfaces import allocated
+
+_fonts = {}  # (path, size, bold, italic) -> font
+
+
+def get_font(path=None, size=20, bold=False, italic=False)-> pygame.font.Font:
+    """Return the font of the process-wide registry, created on first use. The fonts are
+    shared between widgets and must not be modified (e.g. font.bold = True).
+
+    Args:
+        path (str, optional): The font file. Defaults to None (pygame default font).
+        size (int, optional): The font size. Defaults to 20.
+        bold (bool, optional): Defaults to False.
+        italic (bool, optional): Defaults to False.
+
+    Returns:
+        pygame.font.Font: The font.
+    """
+
+    key = (path, size, bold, italic)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(path, size)
+        font.bold = bold
+        font.italic = italic
+        _fonts[key] = font
+    return font
+
+
+class TextRenderCache:
+    """Least recently used cache of rendered strings, shared by the widgets displaying the same
+    text with the same font and color. The surfaces are shared and must not be modified."""
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._renders = OrderedDict()  # (font, text, color, antialias) -> surface, least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font: pygame.font.Font, text, color, antialias=True)-> pygame.Surface:
+        """Render a text, or return its cached render.
+
+        Args:
+            font (pygame.font.Font): The font.
+            text (str): The text.
+            color: The text color.
+            antialias (bool, optional): Defaults to True.
+
+        Returns:
+            pygame.Surface: The render.
+        """
+
+        key = (font, text, color if isinstance(color, (str, tuple)) else tuple(color), antialias)
+        surface = self._renders.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._renders.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = allocated(font.render(text, antialias, color))
+        size = surface.get_pitch() * surface.get_height()
+        if size > self.max_bytes:
+            return surface  # too large to be cached
+        self._renders[key] = surface
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._renders.popitem(last=False)
+            self.bytes -= evicted.get_pitch() * evicted.get_height()
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self._renders.clear()
+        self.bytes = 0
+
+    def stats(self)-> dict:
+        requests = self.hits + self.misses
+        return {"items": len(self._renders), "bytes": self.bytes, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hits / requests if requests else 0}
+
+
+text_cache = TextRenderCache()
+
+
+def render_text(font, text, color, antialias=True)-> pygame.Surface:
+    """Render a text through the process-wide cache (see TextRenderCache.render)."""
+    return text_cache.render(font, text, color, antialias)
@@ -0,0 +1,59 @@
+import pygame
+
+ACTIVE = "active"  # something is animating: frames run at max_fps
+TIMED = "timed"  # a widget needs a frame at a known time (e.g. cursor blink): sleep until then or the next event
+IDLE = "idle"  # nothing is pending: sleep until the next event, or for 1 / min_fps
+
+
+class FrameScheduler:
+    """Paces the frames of the main loop. Instead of running at a fixed rate, the loop sleeps
+    on the event queue while no widget needs a new frame, so an idle window does not use the CPU.
+    """
+    def __init__(self, clock: pygame.time.Clock, min_fps=1, max_fps=60):
+        """
+        Args:
+            clock (pygame.time.Clock): The clock of the main loop.
+            min_fps (float, optional): Frame rate kept while idle, 0 to sleep until an event. Defaults to 1.
+            max_fps (float, optional): Frame rate while animating. Defaults to 60.
+        """
+        self.clock = clock
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.woken_by_event = False  # True if the last wait ended with an event
+
+    def wait(self, delay)-> str:
+        """Wait for the next frame.
+
+        Args:
+            delay (float | None): Time (s) before a widget needs a new frame, 0 to run at full rate,
+                None if no widget needs one.
+
+        Returns:
+            str: The mode chosen for the frame (ACTIVE, TIMED or IDLE).
+        """
+
+        if delay is not None and delay <= 1 / self.max_fps:
+            mode = ACTIVE
+        else:
+            mode = IDLE if delay is None else TIMED
+            if self.min_fps > 0:
+                delay = 1 / self.min_fps if delay is None else min(delay, 1 / self.min_fps)
+            self.woken_by_event = self._wait_event(delay)
+        # caps the frame rate, even when woken by a flow of events
+        self.clock.tick(self.max_fps)
+        return mode
+
+    @staticmethod
+    def _wait_event(timeout)-> bool:
+        """Sleep until an event is received or the timeout (s, None for no timeout) expires."""
+        if timeout is None:
+            event = pygame.event.wait()
+        else:
+            event = pygame.event.wait(max(1, int(timeout * 1000)))
+        if event.type == pygame.NOEVENT:
+            return False
+        # put the event back in front of the queue for the next handle_events
+        events = [event] + pygame.event.get()
+        for event in events:
+            pygame.event.post(event)
+        return True
@@ -1,37 +1,503 @@
+import itertools
 import threading
 import queue
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
 import pygame
+from bazui.atlas import TextureAtlas
+from bazui.bundle import AssetBundle
+from bazui.surfaces import allocated
+
+
+class LoadRequest:
+    """A pending image load."""
+    def __init__(self, name, path, priority, group, bundle=None):
+        self.name = name
+        self.path = path  # file path, or asset name in the bundle
+        self.bundle = bundle  # AssetBundle the image is read from, None for a plain file
+        self.priority = priority  # lower values are loaded first
+        self.group = group  # used to cancel related requests together (e.g. the state that asked for them)
+        self.future = Future()
+
+
+def surface_bytes(surface: pygame.Surface)-> int:
+    """Return the memory used by the pixels of a surface."""
+    return surface.get_pitch() * surface.get_height()
+
+
+def fit_size(image_size, target_size, im_sizing):
+    """Compute the size an image is scaled to, to be displayed in an area.
+
+    Args:
+        image_size (tuple[int, int]): The size of the image.
+        target_size (tuple[int, int]): The size of the area.
+        im_sizing (str): stretch, fitmin (whole image visible), fitmax (area covered) or fixed.
+
+    Returns:
+        tuple[int, int]: The scaled image size.
+    """
+
+    if im_sizing == "fixed":
+        return tuple(image_size)
+    target_size = (int(target_size[0]), int(target_size[1]))
+    if im_sizing == "stretch":
+        return target_size
+    if im_sizing not in ("fitmin", "fitmax"):
+        raise ValueError(f"Invalid image sizing method: {im_sizing}.")
+    # fit the image to the area size, keeping the aspect ratio
+    image_ratio = image_size[0] / image_size[1]
+    target_ratio = target_size[0] / target_size[1]
+    if (image_ratio > target_ratio) == (im_sizing == "fitmin"):
+        return (target_size[0], int(target_size[0] / image_ratio))
+    return (int(target_size[1] * image_ratio), target_size[1])
 
 
 class ImageLibrary:
-    def __init__(self):
-        self._resources = {}
-        self._load_queue = queue.Queue()
-        self._lock = threading.Lock()
-        self._loading_thread = threading.Thread(target=self._background_image_loader, daemon=True)
-        self._loading_thread.start()
+    def __init__(self, workers=1, max_bytes=None, scaled_max_bytes=64 * 1024 * 1024, mipmaps=False, atlas=False,
+                 disk_cache=None):
+        """
+        Args:
+            workers (int, optional): The number of loading threads. Defaults to 1.
+            max_bytes (int, optional): Memory budget of the loaded images. Above it, the least recently
+                used images that no live Image widget uses are evicted. Defaults to None (no limit).
+            scaled_max_bytes (int, optional): Memory budget of the cache of scaled images. Defaults to 64 MiB.
+            mipmaps (bool, optional): Build a pyramid of half size levels of each image when it is loaded,
+                so that downscaling starts from the nearest larger level. Defaults to False.
+            atlas (bool, optional): Pack small images into shared atlas surfaces as they are loaded,
+                so that they can be drawn together with blit_many. Defaults to False.
+            disk_cache (DiskImageCache, optional): Cache of decoded images (and mipmap levels)
+                used instead of decoding the files again. Defaults to None.
+        """
+        self._resources = OrderedDict()  # name -> surface, least recently used first
+        self._pending = {}  # name -> LoadRequest, so that each file is decoded only once
+        self._paths = {}  # name -> load_async entry, to reload evicted images (not failed or cancelled loads)
+        self._bundles = {}  # bundle file path -> AssetBundle, opened once and shared by the loaders
+        self._users = {}  # name -> widgets using the image, which is never evicted while they live
+        self.max_bytes = max_bytes
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # scaled variants, shared by the widgets displaying an image at the same size
+        self._scaled = OrderedDict()  # (name, target size, im_sizing) -> surface, least recently used first
+        self._scaled_keys = {}  # name -> keys of its scaled variants
+        self.scaled_max_bytes = scaled_max_bytes
+        self.scaled_bytes = 0
+        self.scaled_hits = 0
+        self.scaled_misses = 0
+
+        # mipmap pyramids, counted in resident_bytes
+        self.mipmaps = mipmaps
+        self.mipmap_min_size = 16  # levels are built while both sides are at least this size
+        self._mipmaps = {}  # name -> levels, largest first (the full size image excluded)
+        self.mipmap_bytes = 0
+
+        # small images packed together, never evicted (they would not free their atlas area)
+        self.atlas = TextureAtlas() if atlas else None
+        self.disk_cache = disk_cache
+
+        # loading
+        self._load_queue = queue.PriorityQueue()
+        self._counter = itertools.count()  # keeps FIFO order between requests of equal priority
+        self.loaded_event = None  # pygame event type posted when an image finishes loading (None to post nothing)
+        self._lock = threading.RLock()
+        self._loading_threads = [threading.Thread(target=self._background_image_loader, daemon=True) for _ in range(workers)]
+        for thread in self._loading_threads:
+            thread.start()
 
     def _background_image_loader(self):
         while True:
-            im_data = self._load_queue.get()
-            if im_data is None:
-                break
+            _, _, request = self._load_queue.get()
             try:
-                path = im_data["path"]
-                name = im_data["name"]
-                image = pygame.image.load(path).convert_alpha()
+                if request is None:
+                    break
+                with self._lock:
+                    # skip cancelled requests and outdated queue entries of reprioritized ones
+                    if (self._pending.get(request.name) is not request or request.future.running()
+                            or not request.future.set_running_or_notify_cancel()):
+                        continue
+                try:
+                    image = self._decode(request.path, request.bundle)
+                    packed = self.atlas is not None and self.atlas.accepts(image)
+                    levels = self.build_mipmaps(image, request.path, request.bundle) if self.mipmaps and not packed else []
+                except Exception as e:
+                    print(f"Error loading {request.path}: {e}")
+                    with self._lock:
+                        del self._pending[request.name]
+                        self._paths.pop(request.name, None)  # not retried on access
+                    request.future.set_exception(e)
+                    continue
                 with self._lock:
-                    self._resources[name] = image
-            except Exception as e:
-                print(f"Error loading {path}: {e}")
+                    self._store(request.name, image, levels)
+                    del self._pending[request.name]
+                request.future.set_result(image)
+                if self.loaded_event is not None:
+                    try:
+                        pygame.event.post(pygame.event.Event(self.loaded_event, name=request.name))
+                    except pygame.error:
+                        pass  # the display was closed
             finally:
                 self._load_queue.task_done()
 
-    def load_async(self, file_list: list[dict["name": str, "path": str]]):
-        """Load images asynchronously."""
-        for el in file_list:
-            if el.get("name") not in self:
-                self._load_queue.put(el)
+    @staticmethod
+    def _cache_key(path, bundle, variant=None):
+        """Return the disk cache source and variant of an image, bundled images being keyed by their bundle file."""
+        if bundle is None:
+            return path, variant
+        return bundle.path, path if variant is None else f"{path}|{variant}"
+
+    def _decode(self, path, bundle=None)-> pygame.Surface:
+        """Load an image file or bundled image, from the disk cache when possible."""
+        if self.disk_cache is not None:
+            image = self.disk_cache.load(*self._cache_key(path, bundle))
+            if image is not None:
+                return image
+        image = allocated((pygame.image.load(path) if bundle is None else bundle.load_image(path)).convert_alpha())
+        if self.disk_cache is not None:
+            source, variant = self._cache_key(path, bundle)
+            self.disk_cache.store(source, image, variant)
+        return image
+
+    def build_mipmaps(self, image: pygame.Surface, path=None, bundle=None)-> list[pygame.Surface]:
+        """Build the half size levels of an image.
+
+        Args:
+            image (pygame.Surface): The full size image.
+            path (str, optional): The image file, to reuse the levels stored in the disk cache. Defaults to None.
+            bundle (AssetBundle, optional): The bundle path refers to. Defaults to None.
+
+        Returns:
+            list[pygame.Surface]: The levels, largest first.
+        """
+
+        sizes = []
+        width, height = image.get_size()
+        while width // 2 >= self.mipmap_min_size and height // 2 >= self.mipmap_min_size:
+            width, height = width // 2, height // 2
+            sizes.append((width, height))
+
+        use_cache = self.disk_cache is not None and path is not None
+        if use_cache:
+            levels = [self.disk_cache.load(*self._cache_key(path, bundle, f"mipmap{idx}")) for idx in range(len(sizes))]
+            if all(level is not None and level.get_size() == size for level, size in zip(levels, sizes)):
+                return levels
+
+        levels = []
+        level = image
+        for idx, size in enumerate(sizes):
+            level = allocated(pygame.transform.smoothscale(level, size))
+            levels.append(level)
+            if use_cache:
+                source, variant = self._cache_key(path, bundle, f"mipmap{idx}")
+                self.disk_cache.store(source, level, variant)
+        return levels
+
+    def _store(self, name, image, mipmaps=()):
+        self._release(name)
+        if self.atlas is not None and self.atlas.accepts(image):
+            self._resources[name] = self.atlas.add(name, image)  # a subsurface of an atlas page
+            return
+        self._resources[name] = image
+        self.resident_bytes += surface_bytes(image)
+        if mipmaps:
+            self._mipmaps[name] = mipmaps
+            levels_bytes = sum(surface_bytes(level) for level in mipmaps)
+            self.mipmap_bytes += levels_bytes
+            self.resident_bytes += levels_bytes
+        self._evict()
+
+    def _release(self, name):
+        """Drop a loaded image, with its mipmaps and scaled variants."""
+        image = self._resources.pop(name, None)
+        if self.atlas is not None and name in self.atlas.regions:
+            self.atlas.remove(name)
+        elif image is not None:
+            self.resident_bytes -= surface_bytes(image)
+        levels_bytes = sum(surface_bytes(level) for level in self._mipmaps.pop(name, ()))
+        self.mipmap_bytes -= levels_bytes
+        self.resident_bytes -= levels_bytes
+        self._drop_scaled(name)
+
+    def _evict(self):
+        """Evict least recently used images until the memory budget is met."""
+        if self.max_bytes is None:
+            return
+        for name in list(self._resources):
+            if self.resident_bytes <= self.max_bytes:
+                break
+            if self._users.get(name) or (self.atlas is not None and name in self.atlas.regions):
+                continue  # still displayed, or packed in the atlas
+            self._release(name)
+            self.evictions += 1
+
+    def get_scaled(self, name, target_size, im_sizing):
+        """Get an image scaled to be displayed in an area. Scaled variants are cached and shared.
+
+        Args:
+            name (str): The name of the image.
+            target_size (tuple[int, int]): The size of the area.
+            im_sizing (str): The sizing method (see fit_size).
+
+        Returns:
+            pygame.Surface | None: The scaled image, None if the image is not loaded.
+        """
+
+        image = self[name]
+        if image is None:
+            return None
+        if im_sizing == "fixed":
+            return image
+        key = (name, (int(target_size[0]), int(target_size[1])), im_sizing)
+        with self._lock:
+            scaled = self._scaled.get(key)
+            if scaled is not None:
+                self.scaled_hits += 1
+                self._scaled.move_to_end(key)
+                return scaled
+            self.scaled_misses += 1
+
+        desired_size = fit_size(image.get_size(), target_size, im_sizing)
+        if desired_size == image.get_size():
+            scaled = image
+        else:
+            scaled = allocated(pygame.transform.smoothscale(self.mipmap_source(name, desired_size, image), desired_size))
+
+        with self._lock:
+            if key not in self._scaled:
+                self._scaled[key] = scaled
+                self._scaled_keys.setdefault(name, set()).add(key)
+                self.scaled_bytes += surface_bytes(scaled)
+                while self.scaled_bytes > self.scaled_max_bytes and len(self._scaled) > 1:
+                    old_key, old = self._scaled.popitem(last=False)
+                    self._scaled_keys[old_key[0]].discard(old_key)
+                    self.scaled_bytes -= surface_bytes(old)
+        return scaled
+
+    def mipmap_source(self, name, desired_size, image=None):
+        """Return the smallest mipmap level of an image at least as large as a size,
+        to scale from it. Defaults to the full size image.
+
+        Args:
+            name (str): The name of the image.
+            desired_size (tuple[int, int]): The size the image is scaled to.
+            image (pygame.Surface, optional): The full size image, if already fetched. Defaults to None.
+
+        Returns:
+            pygame.Surface | None: The source image, None if the image is not loaded.
+        """
+        with self._lock:
+            if image is None:
+                image = self._resources.get(name)
+            levels = self._mipmaps.get(name, ())
+        source = image
+        for level in levels:
+            if level.get_width() < desired_size[0] or level.get_height() < desired_size[1]:
+                break
+            source = level
+        return source
+
+    def _drop_scaled(self, name):
+        """Forget the scaled variants of an image."""
+        for key in self._scaled_keys.pop(name, ()):
+            self.scaled_bytes -= surface_bytes(self._scaled.pop(key))
+
+    def atlas_region(self, name):
+        """Return where an image is packed in the atlas.
+
+        Args:
+            name (str): The name of the image.
+
+        Returns:
+            tuple[pygame.Surface, pygame.Rect] | None: The atlas page and the image area, None if the image is not packed.
+        """
+        with self._lock:
+            return self.atlas.region(name) if self.atlas is not None else None
+
+    def blit_many(self, dest: pygame.Surface, items):
+        """Draw several images with one Surface.blits call. Packed images are drawn from their
+        atlas page, the others from their own surface. Images not loaded yet are skipped.
+
+        Args:
+            dest (pygame.Surface): The surface to draw on.
+            items (Iterable[tuple[str, tuple[int, int]]]): The image names and positions.
+
+        Returns:
+            int: The number of drawn images.
+        """
+        blits = []
+        with self._lock:
+            for name, pos in items:
+                region = self.atlas.region(name) if self.atlas is not None else None
+                if region is not None:
+                    blits.append((region[0], pos, region[1]))
+                elif name in self._resources:
+                    blits.append((self._resources[name], pos))
+            dest.blits(blits, doreturn=False)
+        return len(blits)
+
+    def add_user(self, name, widget):
+        """Prevent an image from being evicted while a widget uses it.
+
+        Args:
+            name (str): The name of the image.
+            widget: The widget using it, referenced weakly.
+        """
+        with self._lock:
+            self._users.setdefault(name, weakref.WeakSet()).add(widget)
+
+    def remove_user(self, name, widget):
+        """Release an image used by a widget (see add_user)."""
+        with self._lock:
+            users = self._users.get(name)
+            if users is not None:
+                users.discard(widget)
+
+    def stats(self)-> dict:
+        """Return the library memory usage and cache counters."""
+        with self._lock:
+            return {"items": len(self._resources), "resident_bytes": self.resident_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "scaled_items": len(self._scaled), "scaled_bytes": self.scaled_bytes,
+                    "scaled_hits": self.scaled_hits, "scaled_misses": self.scaled_misses,
+                    "mipmap_levels": sum(len(levels) for levels in self._mipmaps.values()),
+                    "mipmap_bytes": self.mipmap_bytes,
+                    "atlas": self.atlas.stats() if self.atlas is not None else None}
+
+    def _enqueue(self, request):
+        self._load_queue.put((request.priority, next(self._counter), request))
+
+    def add_bundle(self, bundle_path)-> AssetBundle:
+        """Open an asset bundle (see bazui.bundle.pack_bundle), once.
+
+        Args:
+            bundle_path (str): The bundle file.
+
+        Returns:
+            AssetBundle: The opened bundle.
+        """
+
+        with self._lock:
+            bundle = self._bundles.get(bundle_path)
+            if bundle is None:
+                bundle = self._bundles[bundle_path] = AssetBundle(bundle_path)
+            return bundle
+
+    def load_async(self, file_list: list[dict["name": str, "path": str]] = (), priority=0, callback=None, group=None,
+                   bundle=None, prefix=None)-> list[Future]:
+        """Load images asynchronously.
+
+        Args:
+            file_list (list[dict]): The images to load, as {"name": ..., "path": ...} dicts. An optional "bundle" key
+                gives the bundle file in which "path" is the name of the image.
+            priority (int, optional): Lower values are loaded first. Defaults to 0.
+            callback (callable, optional): Called with the future of each image once it is done.
+                It runs on a loader thread, or right away if the image is already loaded. Defaults to None.
+            group (optional): Key under which the requests can be cancelled with cancel_group. Defaults to None.
+            bundle (str, optional): A bundle file whose images are all loaded, named after their name in the bundle.
+                Defaults to None.
+            prefix (str, optional): Only load the images of the bundle whose name starts with prefix. Without bundle,
+                the images of every opened bundle are searched. Defaults to None.
+
+        Returns:
+            list[Future]: One future per image, resolving to the loaded surface.
+        """
+
+        futures = []
+        with self._lock:
+            file_list = list(file_list)
+            if bundle is not None or prefix is not None:
+                bundles = [self.add_bundle(bundle)] if bundle is not None else list(self._bundles.values())
+                for opened in bundles:
+                    file_list.extend({"name": name, "path": name, "bundle": opened.path}
+                                     for name in opened.names(prefix or ""))
+            for el in file_list:
+                name = el.get("name")
+                if name in self._resources:
+                    future = Future()
+                    future.set_result(self._resources[name])
+                elif name in self._pending:
+                    # already queued: share the request, raising its priority if needed
+                    self.prioritize(name, priority)
+                    future = self._pending[name].future
+                else:
+                    bundle_path = el.get("bundle")
+                    request = LoadRequest(name, el.get("path"), priority, group,
+                                          self.add_bundle(bundle_path) if bundle_path is not None else None)
+                    self._paths[name] = el
+                    self._pending[name] = request
+                    self._enqueue(request)
+                    future = request.future
+                futures.append(future)
+        if callback is not None:
+            for future in futures:
+                future.add_done_callback(callback)
+        return futures
+
+    def prioritize(self, name, priority=-1):
+        """Move a pending image ahead in the load queue.
+
+        Args:
+            name (str): The name of the image.
+            priority (int, optional): The new priority, applied only if it is higher (lower value). Defaults to -1.
+        """
+
+        with self._lock:
+            request = self._pending.get(name)
+            if request is not None and priority < request.priority and not request.future.running():
+                request.priority = priority
+                self._enqueue(request)  # the old queue entry is skipped when dequeued
+
+    def cancel(self, name)-> bool:
+        """Cancel a pending image load. Loads already being decoded are not cancelled.
+
+        Args:
+            name (str): The name of the image.
+
+        Returns:
+            bool: True if the load was cancelled.
+        """
+
+        with self._lock:
+            request = self._pending.get(name)
+            if request is not None and request.future.cancel():
+                del self._pending[name]
+                self._paths.pop(name, None)  # not reloaded on access
+                return True
+            return False
+
+    def cancel_group(self, group)-> int:
+        """Cancel every pending load requested with a group.
+
+        Args:
+            group: The group given to load_async.
+
+        Returns:
+            int: The number of cancelled loads.
+        """
+
+        with self._lock:
+            names = [name for name, request in self._pending.items() if request.group is group]
+            return sum(self.cancel(name) for name in names)
+
+    def close(self, wait=False):
+        """Stop the loading threads once the queue is processed.
+
+        Args:
+            wait (bool, optional): Wait for the threads to stop, then close the bundles. Defaults to False.
+        """
+
+        for _ in self._loading_threads:
+            self._load_queue.put((float("inf"), next(self._counter), None))
+        if not wait:
+            return
+        for thread in self._loading_threads:
+            thread.join()
+        with self._lock:
+            for bundle in self._bundles.values():
+                bundle.close()
+            self._bundles.clear()
 
     def __setitem__(self, name, image):
         """Set an object in the library.
@@ -49,9 +515,18 @@ class ImageLibrary:
             name (str): The name of the object.
 
         Returns:
-            object: The object. If not found, returns None.
+            object: The object. If not found, returns None, and an evicted object starts reloading.
         """
-        return self._resources.get(name, None)
+        with self._lock:
+            image = self._resources.get(name, None)
+            if image is not None:
+                self.hits += 1
+                self._resources.move_to_end(name)
+                return image
+            self.misses += 1
+            if name in self._paths and name not in self._pending:
+                self.load_async([self._paths[name]])
+            return None
 
     def __contains__(self, name):
         """Check if an object is in the library.
@@ -62,7 +537,8 @@ class ImageLibrary:
         Returns:
             bool: True if the object is in the library, False otherwise.
         """
-        return name in self._resources
+        with self._lock:
+            return name in self._resources
 
     def __delitem__(self, name):
         """Delete an object from the library.
@@ -70,8 +546,9 @@ class ImageLibrary:
         Args:
             name (str): The name of the object.
         """
-        if name in self._resources:
-            del self._resources[name]
+        with self._lock:
+            self._release(name)
+            self._paths.pop(name, None)
 
     def __repr__(self):
         """Get a string representation of the library.
@@ -79,4 +556,5 @@ class ImageLibrary:
         Returns:
             str: The string representation of the library.
         """
-        return f"ImageLibrary({len(self._resources)} items) \n" + "\n".join(self._resources.keys())
\ No newline at end of file
+        with self._lock:
+            return f"ImageLibrary({len(self._resources)} items) \n" + "\n".join(self._resources.keys())
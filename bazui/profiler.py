@@ -0,0 +1,263 @@
+import functools
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+import pygame
+from bazui.ui.widget import Widget
+from bazui.fonts import get_font
+from bazui import surfaces
+
+PHASES = ("handle_events", "update", "draw", "flip", "wait")
+WIDGET_METHODS = ("update", "draw", "access_surface")
+
+
+class FrameProfiler:
+    """Measures where the frame time goes.
+
+    Each frame records the duration of the main loop phases (handle_events, update, draw, flip
+    and the wait for the next frame) in a ring buffer of the last frames. While installed, the
+    update, draw and access_surface methods of every Widget class are timed: each widget
+    accumulates the self time of these methods (excluding the time of the childs and of the
+    other timed methods they call) and the number of surfaces allocated by them. Only the
+    allocations of bazui are counted (widget surfaces, text renders, scaled images...), reported
+    through bazui.surfaces.allocated: pygame is never patched. Timing the widgets patches the
+    widget classes, so it is only done while the profiler is installed.
+
+    The results are shown by an overlay toggled with overlay_key, and can be exported to JSON
+    or to the Chrome trace format (chrome://tracing, Perfetto).
+    """
+    def __init__(self, history=300, trace_widgets=False):
+        """
+        Args:
+            history (int, optional): Number of frames kept in the ring buffer. Defaults to 300.
+            trace_widgets (bool, optional): Also keep every timed widget call of the frames,
+                for the Chrome trace export. Defaults to False.
+        """
+        self.frames = deque(maxlen=history)  # last frames, oldest first
+        self.trace_widgets = trace_widgets
+        self.widget_stats = {}  # id(widget) -> {"widget": label, method: self time (s), "surfaces": count}
+        self.frame_count = 0
+        self.overlay_visible = False
+        self.overlay_key = pygame.K_F3
+        self.overlay_widgets = 5  # number of widgets listed by the overlay
+        self.installed = False
+
+        self._origin = perf_counter()
+        self._frame = None  # record of the current frame
+        self._stack = []  # timed widget calls in progress: [widget, method, child time, surfaces]
+        self._patched = {}  # (owner, name) -> original attribute
+        self._thread = None  # widgets are only timed in the thread of the main loop
+        self._known_classes = 0
+
+    # installation
+    def install(self):
+        """Start timing the widget methods and counting surface allocations."""
+        if self.installed:
+            return
+        self.installed = True
+        self._thread = threading.get_ident()
+        self._patch_widget_classes()
+        surfaces.allocation_hook = self._count_surface
+
+    def uninstall(self):
+        """Restore the widget classes and stop counting surface allocations."""
+        for (owner, name), original in self._patched.items():
+            setattr(owner, name, original)
+        self._patched.clear()
+        if surfaces.allocation_hook == self._count_surface:
+            surfaces.allocation_hook = None
+        self._known_classes = 0
+        self.installed = False
+
+    def _patch(self, owner, name, value):
+        self._patched[(owner, name)] = owner.__dict__[name]
+        setattr(owner, name, value)
+
+    def _patch_widget_classes(self):
+        """Wrap the timed methods of the Widget classes not wrapped yet (e.g. defined after install)."""
+        classes = [Widget]
+        for cls in classes:
+            classes.extend(cls.__subclasses__())
+        if len(classes) == self._known_classes:
+            return
+        self._known_classes = len(classes)
+        for cls in classes:
+            for method in WIDGET_METHODS:
+                if method in cls.__dict__ and (cls, method) not in self._patched:
+                    self._patch(cls, method, self._timed(cls.__dict__[method], method))
+
+    def _timed(self, function, method):
+        profiler = self
+
+        @functools.wraps(function)
+        def timed(widget, *args, **kwargs):
+            stack = profiler._stack
+            if (stack and stack[-1][0] is widget and stack[-1][1] == method) or threading.get_ident() != profiler._thread:
+                # super() call of an overriding method, already timed
+                return function(widget, *args, **kwargs)
+            entry = [widget, method, 0.0, 0]
+            stack.append(entry)
+            start = perf_counter()
+            try:
+                return function(widget, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][2] += elapsed
+                profiler._record_call(widget, method, start, elapsed - entry[2], entry[3])
+        return timed
+
+    def _count_surface(self):
+        if threading.get_ident() != self._thread:
+            return  # e.g. images decoded by the library threads
+        if self._stack:
+            self._stack[-1][3] += 1
+        if self._frame is not None:
+            self._frame["surfaces"] += 1
+
+    def _record_call(self, widget, method, start, self_time, surfaces):
+        stats = self.widget_stats.get(id(widget))
+        if stats is None:
+            stats = {"widget": f"{type(widget).__name__}:{widget.name}", "surfaces": 0}
+            stats.update((name, 0.0) for name in WIDGET_METHODS)
+            self.widget_stats[id(widget)] = stats
+        stats[method] += self_time
+        stats["surfaces"] += surfaces
+        if self._frame is not None:
+            self._frame["widget_time"] += self_time
+            if self.trace_widgets:
+                self._frame["calls"].append((stats["widget"], method, start - self._origin, self_time))
+
+    # frames
+    def begin_frame(self):
+        if self.installed:
+            self._patch_widget_classes()
+        self._frame = {"frame": self.frame_count, "start": perf_counter() - self._origin, "duration": 0.0,
+                       "phases": {}, "surfaces": 0, "widget_time": 0.0, "mode": None, "calls": []}
+
+    @contextmanager
+    def phase(self, name):
+        """Time a phase of the current frame."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            if self._frame is not None:
+                self._frame["phases"][name] = (start - self._origin, perf_counter() - start)
+
+    def end_frame(self, mode=None):
+        """Store the current frame in the ring buffer.
+
+        Args:
+            mode (str, optional): The frame pacing mode of the frame. Defaults to None.
+        """
+
+        frame = self._frame
+        if frame is None:
+            return
+        self._frame = None
+        frame["duration"] = perf_counter() - self._origin - frame["start"]
+        frame["mode"] = mode
+        self.frames.append(frame)
+        self.frame_count += 1
+
+    def reset(self):
+        self.frames.clear()
+        self.widget_stats.clear()
+        self.frame_count = 0
+
+    # results
+    def phase_averages(self)-> dict:
+        """Return the average duration (s) of each phase over the frames of the ring buffer."""
+        totals = {}
+        for frame in self.frames:
+            for name, (_, duration) in frame["phases"].items():
+                totals[name] = totals.get(name, 0) + duration
+        return {name: total / len(self.frames) for name, total in totals.items()}
+
+    def slowest_widgets(self, count=10)-> list[dict]:
+        """Return the stats of the widgets with the highest cumulative self time, slowest first."""
+        return sorted(self.widget_stats.values(), key=lambda stats: sum(stats[name] for name in WIDGET_METHODS),
+                      reverse=True)[:count]
+
+    def to_dict(self)-> dict:
+        frames = []
+        for frame in self.frames:
+            frame = dict(frame, phases={name: duration for name, (_, duration) in frame["phases"].items()})
+            del frame["calls"]
+            frames.append(frame)
+        return {"frame_count": self.frame_count, "phase_averages": self.phase_averages(), "frames": frames,
+                "widgets": self.slowest_widgets(len(self.widget_stats))}
+
+    def export_json(self, path):
+        """Write the frames of the ring buffer and the widget stats to a JSON file (times in seconds)."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=1)
+
+    def chrome_trace(self)-> dict:
+        """Return the frames of the ring buffer as Chrome trace events (times in microseconds)."""
+        events = []
+        for frame in self.frames:
+            events.append({"name": f"frame {frame['frame']}", "cat": "frame", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": frame["start"] * 1e6, "dur": frame["duration"] * 1e6,
+                           "args": {"surfaces": frame["surfaces"], "mode": frame["mode"]}})
+            for name, (start, duration) in frame["phases"].items():
+                events.append({"name": name, "cat": "phase", "ph": "X", "pid": 0, "tid": 0,
+                               "ts": start * 1e6, "dur": duration * 1e6})
+            for widget, method, start, self_time in frame["calls"]:
+                # self times, the events of a widget do not cover its childs
+                events.append({"name": f"{widget}.{method}", "cat": "widget", "ph": "X", "pid": 0, "tid": 1,
+                               "ts": start * 1e6, "dur": self_time * 1e6})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.chrome_trace(), file)
+
+    # overlay
+    def handle_event(self, event)-> bool:
+        """Toggle the overlay with overlay_key. Returns True if the event was consumed."""
+        if event.type == pygame.KEYDOWN and event.key == self.overlay_key:
+            self.overlay_visible = not self.overlay_visible
+            return True
+        return False
+
+    def overlay_lines(self)-> list[str]:
+        if not self.frames:
+            return ["no frame profiled"]
+        last = self.frames[-1]
+        averages = self.phase_averages()
+        lines = [f"frame {last['frame']}: {last['duration'] * 1000:.1f} ms, {last['surfaces']} surfaces"
+                 + (f" ({last['mode']})" if last["mode"] else ""),
+                 "  ".join(f"{name} {averages.get(name, 0) * 1000:.2f}" for name in PHASES) + " ms (avg)"]
+        if self.widget_stats:
+            frames = max(1, self.frame_count)
+            lines.append("slowest widgets (self ms/frame of update/draw/access_surface):")
+            for stats in self.slowest_widgets(self.overlay_widgets):
+                times = "/".join(f"{stats[name] * 1000 / frames:.2f}" for name in WIDGET_METHODS)
+                lines.append(f"  {stats['widget']}: {times}, {stats['surfaces']} surfaces")
+        return lines
+
+    def draw_overlay(self, screen: pygame.Surface)-> pygame.Rect | None:
+        """Draw the overlay, if visible, in the top left corner of the screen.
+
+        Returns:
+            pygame.Rect | None: The area of the overlay, None if it is hidden.
+        """
+
+        if not self.overlay_visible:
+            return None
+        font = get_font(size=16)
+        renders = [font.render(line, True, "white") for line in self.overlay_lines()]
+        width = max(render.get_width() for render in renders) + 8
+        height = sum(render.get_height() for render in renders) + 8
+        rect = pygame.Rect(0, 0, width, height).clip(screen.get_rect())
+        screen.fill((0, 0, 0), rect)
+        y = 4
+        for render in renders:
+            screen.blit(render, (4, y))
+            y += render.get_height()
+        return rect
@@ -7,11 +7,13 @@ class StateManager:
     def set_active(self, state_idx):
         self.crt_state = state_idx
         self.opened_states[state_idx].ui_context.exit_events = True
+        self.opened_states[state_idx].ui_context.full_redraw = True
         self.opened_states[state_idx].on_activation()
     def close_crt_state(self):
         if self.crt_state is not None:
             self.opened_states[self.crt_state].ui_context.exit_events = True
-            self.opened_states.pop(self.crt_state)
+            closed_state = self.opened_states.pop(self.crt_state)
+            self.app.library.cancel_group(closed_state)  # images requested for the state are not needed anymore
             if len(self.opened_states) > 0:
                 self.set_active(min(self.crt_state, len(self.opened_states) - 1))
             else:
@@ -27,6 +29,11 @@ class StateManager:
         if self.crt_state is not None:
             self.opened_states[self.crt_state].update()
 
+    def next_frame_delay(self):
+        if self.crt_state is not None:
+            return self.opened_states[self.crt_state].next_frame_delay()
+        return None
+
     def draw(self, screen):
         if self.crt_state is not None:
-            self.opened_states[self.crt_state].draw(screen)
+            return self.opened_states[self.crt_state].draw(screen)
@@ -1,25 +1,44 @@
 import pygame
 from bazui.ui.ui_context import UIContext
+from bazui.states.event_coalescing import EventCoalescer
 
 class BaseState:
     def __init__(self, app):
         self.app = app
         self.app_state = app.app_state  # Access shared state
         self.ui_context = UIContext(self.app_state)  # Access UI manager
+        self.event_coalescer = EventCoalescer(self.app_state.merge_key_repeat)
 
     def handle_events(self):
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if self.app_state.event_coalescing:
+            events = self.event_coalescer.coalesce(events)
+        for event in events:
             if event.type == pygame.QUIT:
                 self.app.quit(None)
+            if self.app.profiler is not None and self.app.profiler.handle_event(event):
+                self.ui_context.full_redraw = True  # repaint the area of the overlay
+                continue
             self.ui_context.handle_events(event)
 
     def update(self):
         self.ui_context.update()
 
     def draw(self, screen):
+        """Draw the state on the screen.
+
+        Returns:
+            list[pygame.Rect] | None: The repainted areas in dirty-region mode, None when the whole screen was repainted.
+        """
+        if self.app_state.dirty_rendering:
+            return self.ui_context.draw_dirty(screen, self.app_state.background_color)
         screen.fill(self.app_state.background_color)
         self.ui_context.draw(screen)
 
+    def next_frame_delay(self):
+        """Return the time (s) before the state needs a new frame, 0 for the next one, None if it does not need one."""
+        return self.ui_context.next_frame_delay()
+
     def on_activation(self):
         """Called when the state is activated."""
         pass
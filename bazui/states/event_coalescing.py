@@ -0,0 +1,65 @@
+import pygame
+
+RESIZE_EVENTS = frozenset({pygame.VIDEORESIZE, pygame.WINDOWRESIZED, pygame.WINDOWSIZECHANGED})
+
+
+class EventCoalescer:
+    """Collapses the redundant events of a frame before they are dispatched to the widgets:
+    runs of MOUSEMOTION events become their last event (relative motions summed), only the
+    last resize event of each type is kept, and optionally bursts of repeated KEYDOWN events
+    become a single one. Button transitions and every other event are kept in order."""
+    def __init__(self, merge_key_repeat=False):
+        self.merge_key_repeat = merge_key_repeat
+        self.received = 0
+        self.dispatched = 0
+        self.last_frame = {"received": 0, "dispatched": 0}
+
+    def coalesce(self, events)-> list:
+        """Coalesce the events of a frame.
+
+        Args:
+            events (list[pygame.event.Event]): The events, in order.
+
+        Returns:
+            list[pygame.event.Event]: The events to dispatch, in order.
+        """
+
+        kept = []
+        last_resize = {}  # event type -> index in kept
+        last_key_down = None  # KEYDOWN starting a burst of repeats
+        dropping_repeat = False  # the TEXTINPUT of a dropped repeat is dropped too
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                previous = kept[-1] if kept else None
+                if previous is not None and previous.type == pygame.MOUSEMOTION and previous.buttons == event.buttons:
+                    merged = dict(previous.dict, **event.dict)
+                    merged["rel"] = (previous.rel[0] + event.rel[0], previous.rel[1] + event.rel[1])
+                    kept[-1] = pygame.event.Event(pygame.MOUSEMOTION, merged)
+                    continue
+            elif event.type in RESIZE_EVENTS:
+                if event.type in last_resize:
+                    kept[last_resize[event.type]] = None
+                last_resize[event.type] = len(kept)
+            elif self.merge_key_repeat and event.type == pygame.KEYDOWN:
+                if (last_key_down is not None and event.key == last_key_down.key and event.mod == last_key_down.mod
+                        and event.unicode == last_key_down.unicode):
+                    dropping_repeat = True
+                    continue
+                last_key_down, dropping_repeat = event, False
+            elif event.type == pygame.TEXTINPUT:
+                if dropping_repeat:
+                    continue
+            else:
+                last_key_down, dropping_repeat = None, False
+            kept.append(event)
+
+        kept = [event for event in kept if event is not None]
+        self.received += len(events)
+        self.dispatched += len(kept)
+        self.last_frame = {"received": len(events), "dispatched": len(kept)}
+        return kept
+
+    def stats(self)-> dict:
+        """Return the number of received, dispatched and dropped events, in total and for the last frame."""
+        return {"received": self.received, "dispatched": self.dispatched, "dropped": self.received - self.dispatched,
+                "last_frame_dropped": self.last_frame["received"] - self.last_frame["dispatched"]}
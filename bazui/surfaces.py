@@ -0,0 +1,18 @@
+allocation_hook = None  # called for each surface allocated by bazui, set by the FrameProfiler
+
+
+def allocated(surface):
+    """Report a surface allocated by bazui (created, rendered, scaled or loaded) and return it.
+    The allocation points of bazui go through it, so that they can be counted without
+    patching pygame.
+
+    Args:
+        surface (pygame.Surface): The new surface.
+
+    Returns:
+        pygame.Surface: The same surface.
+    """
+
+    if allocation_hook is not None:
+        allocation_hook()
+    return surface
@@ -0,0 +1,451 @@
+from bazui.ui.widget import Widget
+from bazui.ui.link import get
+
+HORIZONTAL = 0  # childs laid out from left to right
+VERTICAL = 1  # childs laid out from top to bottom
+INF = float("inf")
+
+
+class FIXED:
+    """Size set to a value."""
+    def __init__(self, value=0):
+        self.value = value
+        self.min = self.max = value
+
+    def __call__(self):
+        return self.value
+
+    def __repr__(self):
+        return f"FIXED({self.value})"
+
+
+class FIT:
+    """Size fitting the content (childs, or content_size for a leaf), within min and max."""
+    def __init__(self, min=0, max=INF):
+        self.min = min
+        self.max = max
+
+    def __repr__(self):
+        return f"FIT({self.min}, {self.max})"
+
+
+class GROW:
+    """Size fitting the content, then growing to fill the space left in the parent, within min and max."""
+    def __init__(self, min=0, max=INF):
+        self.min = min
+        self.max = max
+
+    def __repr__(self):
+        return f"GROW({self.min}, {self.max})"
+
+
+class Padding:
+    """Space between the border of a node and its childs. Assign a new Padding to change it,
+    modifications in place are not detected."""
+    def __init__(self, top=0, right=0, bottom=0, left=0):
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.left = left
+
+    def on_axis(self, axis):
+        return (self.left, self.right) if axis == 0 else (self.top, self.bottom)
+
+    def __repr__(self):
+        return f"Padding({self.top}, {self.right}, {self.bottom}, {self.left})"
+
+
+def minmax(value, min, max):
+    return min if value < min else max if value > max else value
+
+
+ALIGNMENTS = {"start": 0, "center": 0.5, "end": 1}
+
+
+def water_fill(sizes, limits, amount)-> tuple[list[float], float]:
+    """Raise the smallest sizes to a common level, each without exceeding its limit, so that
+    the sizes grow by amount in total. The level is found by sorting the sizes and limits
+    once, instead of repeatedly raising the smallest sizes to the next ones.
+
+    Args:
+        sizes (list[float]): The current sizes.
+        limits (list[float]): The maximum of each size (not smaller than the size).
+        amount (float): The total growth.
+
+    Returns:
+        tuple[list[float], float]: The new sizes, and the part of amount left when every size reached its limit.
+    """
+
+    if not sizes or amount <= 0:
+        return list(sizes), max(amount, 0)
+    # the total growth is piecewise linear in the level: each size starts growing
+    # when the level reaches it (+1 slope) and stops at its limit (-1 slope)
+    events = sorted([(size, 1) for size in sizes] + [(limit, -1) for limit in limits if limit < INF])
+    level = events[0][0]
+    slope = 0
+    total = 0
+    for position, delta in events:
+        step = slope * (position - level)
+        if total + step >= amount:
+            level += (amount - total) / slope
+            break
+        total += step
+        level = position
+        slope += delta
+    else:
+        level = level + (amount - total) / slope if slope > 0 else INF
+    grown = [minmax(level, size, limit) for size, limit in zip(sizes, limits)]
+    return grown, max(0, amount - (sum(grown) - sum(sizes)))
+
+
+def water_drain(sizes, limits, amount)-> tuple[list[float], float]:
+    """Lower the largest sizes to a common level, each without going below its limit,
+    so that the sizes shrink by amount in total (see water_fill)."""
+    shrunk, left = water_fill([-size for size in sizes], [-limit for limit in limits], amount)
+    return [-size for size in shrunk], left
+
+
+def _layout_attribute(name, doc, parent_dependent=False):
+    """Property whose change marks the node for a new layout (and its parent, if the parent
+    distributes its space according to it)."""
+    private = "_" + name
+
+    def getter(node):
+        return getattr(node, private)
+
+    def setter(node, value):
+        if getattr(node, private) != value:
+            setattr(node, private, value)
+            node.mark_dirty()
+            if parent_dependent and node.parent is not None:
+                node.parent.mark_dirty()
+    return property(getter, setter, doc=doc)
+
+
+class LayoutNode:
+    """Node of a flex layout tree: a box sized by its sizing on each axis (FIXED, FIT or GROW)
+    laying out its childs in a row or a column, with a padding and a gap between them.
+
+    The layout runs in three passes: fit sizes are computed bottom-up, the space of each node
+    is distributed to its childs top-down (growing or shrinking them), and the resulting rects
+    are applied to the widgets of the nodes. Each pass only visits the nodes whose constraints
+    changed and their ancestors: a node whose fit size, assigned size and position did not
+    change keeps its subtree as it was.
+
+    An unchanged tree and a change inside a subtree (e.g. the content of a leaf) are laid out in
+    well under a millisecond, even with thousands of nodes. A change of the space available to
+    the root (e.g. a window resize) still visits every node whose size changes, which are all of
+    them when GROW nodes run down the whole tree: a few microseconds per node, about 30 ms for
+    5000 nodes.
+    """
+    sizing = _layout_attribute("sizing", "(x sizing, y sizing): FIXED, FIT or GROW on each axis.", parent_dependent=True)
+    direction = _layout_attribute("direction", "HORIZONTAL or VERTICAL.")
+    padding = _layout_attribute("padding", "Padding around the childs.")
+    child_gap = _layout_attribute("child_gap", "Space between two childs.")
+    child_alignment = _layout_attribute("child_alignment", "(x alignment, y alignment): start, center or end.")
+    content_size = _layout_attribute("content_size", "Size fitted by a node without childs.")
+
+    def __init__(self, sizing=None, direction=HORIZONTAL, padding=None, child_gap=0,
+                 child_alignment=("start", "start"), content_size=(0, 0), widget=None):
+        """
+        Args:
+            sizing (tuple, optional): The x and y sizing. Defaults to (FIT(), FIT()).
+            direction (int, optional): HORIZONTAL or VERTICAL. Defaults to HORIZONTAL.
+            padding (Padding, optional): Defaults to no padding.
+            child_gap (int, optional): Defaults to 0.
+            child_alignment (tuple[str, str], optional): Alignment of the childs on each axis, in the
+                space they leave. Defaults to ("start", "start").
+            content_size (tuple, optional): Size fitted by the node when it has no childs. Defaults to (0, 0).
+            widget (Widget, optional): The widget placed at the rect of the node. Defaults to None.
+        """
+        self._sizing = sizing if sizing is not None else (FIT(), FIT())
+        self._direction = direction
+        self._padding = padding if padding is not None else Padding()
+        self._child_gap = child_gap
+        self._child_alignment = child_alignment
+        self._content_size = tuple(content_size)
+        self.widget = widget
+        self.parent = None
+        self.childs = []
+
+        # layout results
+        self.size = (0, 0)
+        self.rel = (0, 0)  # position relative to the parent node
+        self._fit = (0, 0)  # size fitting the content
+
+        # incremental layout state
+        self._dirty = True  # the constraints of the node changed
+        self._descendant_dirty = False  # the constraints of a descendant changed
+        self._laid_size = None  # size the childs were last distributed for
+        self._relaid = False  # childs were laid out since the last apply
+        self._applied = None  # (x, y, size) last applied to the widget
+
+    def mark_dirty(self):
+        """Schedule the node, and its ancestors, for a new layout."""
+        self._dirty = True
+        node = self.parent
+        while node is not None and not node._descendant_dirty:
+            node._descendant_dirty = True
+            node = node.parent
+
+    def add_child(self, node: "LayoutNode", index=None)-> "LayoutNode":
+        if node.parent is not None:
+            node.parent.remove_child(node)
+        node.parent = self
+        if index is None:
+            self.childs.append(node)
+        else:
+            self.childs.insert(index, node)
+        node._applied = None
+        self.mark_dirty()
+        return node
+
+    def remove_child(self, node: "LayoutNode"):
+        self.childs.remove(node)
+        node.parent = None
+        self.mark_dirty()
+
+    # fit sizes, bottom-up
+    def fit(self)-> bool:
+        """Compute the fit size of the node and of its outdated descendants.
+
+        Returns:
+            bool: True if the fit size of the node changed.
+        """
+
+        if not (self._dirty or self._descendant_dirty):
+            return False
+        for child in self.childs:
+            if child.fit():
+                self._dirty = True  # the space has to be distributed again
+        if not self._dirty:
+            return False
+        fit = (self._fit_axis(0), self._fit_axis(1))
+        changed = fit != self._fit
+        self._fit = fit
+        return changed
+
+    def _fit_axis(self, axis):
+        sizing = self._sizing[axis]
+        if isinstance(sizing, FIXED):
+            return sizing.value
+        padding = self._padding.on_axis(axis)
+        if not self.childs:
+            content = self._content_size[axis]
+        elif axis == self._direction:
+            content = sum(child._fit[axis] for child in self.childs) + self._child_gap * (len(self.childs) - 1)
+        else:
+            content = max(child._fit[axis] for child in self.childs)
+        return minmax(content + padding[0] + padding[1], sizing.min, sizing.max)
+
+    # distribution, top-down
+    def distribute(self, size, rel=(0, 0)):
+        """Give its size and position to the node, and lay out its childs if needed.
+
+        Args:
+            size (tuple[float, float]): The size of the node.
+            rel (tuple[float, float], optional): The position of the node relative to its parent. Defaults to (0, 0).
+        """
+
+        self.rel = rel
+        if not self._dirty and size == self._laid_size:
+            if self._descendant_dirty:
+                # only some subtrees changed, without changing the size of their root
+                for child in self.childs:
+                    if child._dirty or child._descendant_dirty:
+                        child.distribute(child.size, child.rel)
+                self._descendant_dirty = False
+                self._relaid = True
+            return
+
+        self.size = self._laid_size = size
+        self._dirty = self._descendant_dirty = False
+        self._relaid = True
+        if not self.childs:
+            return
+
+        main = self._direction
+        cross = 1 - main
+        padding_main = self._padding.on_axis(main)
+        padding_cross = self._padding.on_axis(cross)
+        inner_main = size[main] - padding_main[0] - padding_main[1]
+        inner_cross = size[cross] - padding_cross[0] - padding_cross[1]
+        gaps = self._child_gap * (len(self.childs) - 1)
+
+        # main axis: grow the GROW childs, or shrink the non FIXED ones, to fill the space
+        mains = [child._fit[main] for child in self.childs]
+        free = inner_main - gaps - sum(mains)
+        if free != 0:
+            if free > 0:
+                indexes = [i for i, child in enumerate(self.childs) if isinstance(child._sizing[main], GROW)]
+                limits = [max(self.childs[i]._sizing[main].max, mains[i]) for i in indexes]
+                resized, _ = water_fill([mains[i] for i in indexes], limits, free)
+            else:
+                indexes = [i for i, child in enumerate(self.childs) if not isinstance(child._sizing[main], FIXED)]
+                limits = [min(self.childs[i]._sizing[main].min, mains[i]) for i in indexes]
+                resized, _ = water_drain([mains[i] for i in indexes], limits, -free)
+            for i, child_size in zip(indexes, resized):
+                mains[i] = child_size
+            free = inner_main - gaps - sum(mains)
+
+        # positions, childs aligned in the space left
+        offset = padding_main[0] + max(0, free) * ALIGNMENTS[self._child_alignment[main]]
+        cross_alignment = ALIGNMENTS[self._child_alignment[cross]]
+        gap = self._child_gap
+        for child, child_main in zip(self.childs, mains):
+            sizing = child._sizing[cross]
+            child_cross = child._fit[cross]
+            if isinstance(sizing, GROW):
+                child_cross = minmax(inner_cross, sizing.min, sizing.max)
+            elif isinstance(sizing, FIT) and child_cross > inner_cross:
+                child_cross = max(inner_cross, sizing.min)
+            cross_pos = padding_cross[0] + max(0, inner_cross - child_cross) * cross_alignment
+            if main == HORIZONTAL:
+                child_size, child_rel = (child_main, child_cross), (offset, cross_pos)
+            else:
+                child_size, child_rel = (child_cross, child_main), (cross_pos, offset)
+            if child.childs:
+                child.distribute(child_size, child_rel)
+            else:
+                # leaf, inlined: most nodes are leaves
+                child.rel = child_rel
+                child.size = child._laid_size = child_size
+                child._dirty = child._descendant_dirty = False
+            offset += child_main + gap
+
+    # application to the widgets
+    def apply(self, origin_x, origin_y):
+        """Place the widgets of the node and of its descendants that moved or were resized.
+
+        Args:
+            origin_x (float): x of the parent node on screen.
+            origin_y (float): y of the parent node on screen.
+        """
+
+        x = origin_x + self.rel[0]
+        y = origin_y + self.rel[1]
+        placement = (x, y, self.size)
+        moved = placement != self._applied
+        if moved:
+            self._applied = placement
+            if self.widget is not None and self.parent is not None:
+                # rounded edges: adjacent nodes stay adjacent
+                left, top = round(x), round(y)
+                self.widget.pos = (left, top)
+                self.widget.size = (round(x + self.size[0]) - left, round(y + self.size[1]) - top)
+        if moved or self._relaid:
+            self._relaid = False
+            for child in self.childs:
+                child.apply(x, y)
+
+    def root_size(self, available)-> tuple:
+        """Return the size of a root node given the space available to it."""
+        size = []
+        for axis in (0, 1):
+            sizing = self._sizing[axis]
+            if isinstance(sizing, GROW):
+                size.append(minmax(available[axis], sizing.min, sizing.max))
+            else:
+                size.append(self._fit[axis])
+        return tuple(size)
+
+    def layout(self, pos, available):
+        """Lay out the tree of a root node.
+
+        Args:
+            pos (tuple[float, float]): The position of the root node.
+            available (tuple[float, float]): The space available to the root node (used by GROW sizings).
+
+        Returns:
+            tuple[float, float]: The size of the root node.
+        """
+
+        self.fit()
+        size = self.root_size(available)
+        self.distribute(size)
+        self.apply(pos[0], pos[1])
+        return size
+
+    def __repr__(self):
+        return f"LayoutNode(size={self.size}, rel={self.rel}, sizing={self._sizing}, childs={len(self.childs)})"
+
+
+class FlexBox(Widget):
+    """Widget laying out its childs in a row or a column with a flex layout (see LayoutNode).
+
+    Each child gets a layout_node holding its sizing, created by set_child. A FlexBox child
+    joins the layout tree of its parent instead of being laid out on its own, so that a tree of
+    FlexBox widgets is laid out in one pass by the outermost one. The layout is recomputed only
+    where constraints changed: a FlexBox whose tree is unchanged costs nothing per frame, while
+    resizing the root lays out again every node whose size follows it (see LayoutNode).
+    """
+    def __init__(self, pos, size, name, app, **kwargs):
+        self.layout_node = LayoutNode(sizing=(GROW(), GROW()), widget=self)
+        super().__init__(pos, size, name, app)
+
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+            else:
+                raise AttributeError(f"FlexBox has no attribute {key}")
+
+        self._laid_out = None  # (pos, size) of the last layout of the tree
+
+    sizing = property(lambda self: self.layout_node.sizing,
+                      lambda self, value: setattr(self.layout_node, "sizing", value))
+    direction = property(lambda self: self.layout_node.direction,
+                         lambda self, value: setattr(self.layout_node, "direction", value))
+    padding = property(lambda self: self.layout_node.padding,
+                       lambda self, value: setattr(self.layout_node, "padding", value))
+    child_gap = property(lambda self: self.layout_node.child_gap,
+                         lambda self, value: setattr(self.layout_node, "child_gap", value))
+    child_alignment = property(lambda self: self.layout_node.child_alignment,
+                               lambda self, value: setattr(self.layout_node, "child_alignment", value))
+
+    def set_child(self, widget: Widget, sizing=None, index=None)-> Widget:
+        """Add a child widget to the layout.
+
+        Args:
+            widget (Widget): The widget to add. A widget without layout_node fits its current size,
+                change its layout_node.content_size to resize it afterwards.
+            sizing (tuple, optional): The x and y sizing of the child. Defaults to the sizing of its
+                layout_node if it has one, (FIT(), FIT()) otherwise.
+            index (int, optional): Position of the child in the layout. Defaults to None (last).
+
+        Returns:
+            Widget: The added widget.
+        """
+
+        node = getattr(widget, "layout_node", None)
+        if node is None:
+            node = widget.layout_node = LayoutNode(content_size=tuple(get(widget.size)), widget=widget)
+        if sizing is not None:
+            node.sizing = sizing
+        self.layout_node.add_child(node, index)
+        super().set_child(widget)
+        if index is not None:
+            self.childs.insert(index, self.childs.pop())  # drawing order follows the layout order
+        return widget
+
+    def remove_child(self, widget: Widget):
+        node = getattr(widget, "layout_node", None)
+        if node is not None and node.parent is self.layout_node:
+            self.layout_node.remove_child(node)
+        super().remove_child(widget)
+
+    def layout(self):
+        """Lay out the tree if this FlexBox is its root and something changed."""
+        node = self.layout_node
+        if node.parent is not None:
+            return  # laid out by the root
+        pos, size = tuple(get(self.pos)), tuple(get(self.size))
+        if not (node._dirty or node._descendant_dirty) and (pos, size) == self._laid_out:
+            return
+        root_size = node.layout(pos, size)
+        if root_size != size:
+            self.size = (round(root_size[0]), round(root_size[1]))  # FIT and FIXED roots size themselves
+        self._laid_out = (pos, tuple(get(self.size)))
+
+    def update(self):
+        self.layout()
+        super().update()
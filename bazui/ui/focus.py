@@ -0,0 +1,121 @@
+import pygame
+
+KEYBOARD_EVENTS = frozenset({pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT, pygame.TEXTEDITING})
+
+
+class FocusManager:
+    """Tracks the focused widget (the selected one) of a UIContext and delivers keyboard events
+    along its ancestor path only, instead of broadcasting them to every widget.
+
+    Delivery goes through three phases: capture (on_key_capture of the ancestors, from the top
+    level down), target (handle_event of the focused widget) and bubble (on_key of the ancestors,
+    from the parent up). A callback returning True stops the delivery. KEYUP events are also
+    delivered to the widgets that received the matching KEYDOWN, so that a key released after a
+    focus change still stops its repetition. Unconsumed Tab and Shift+Tab move the focus in the
+    precomputed tab order.
+    """
+    def __init__(self, ui_context):
+        self.ui_context = ui_context
+        self.focused = None
+        self.path = []  # top level widget first, focused widget last
+        self.key_holders = {}  # key -> widgets that received its KEYDOWN
+        self._tab_order = None  # focusable widgets in tree order, rebuilt after tree changes
+
+    def focus(self, widget):
+        """Give the focus to a widget (selecting it), or remove it with None."""
+        if widget is self.focused:
+            return
+        previous, self.focused = self.focused, widget
+        if previous is not None:
+            previous.selected = False
+        self.path = []
+        ancestor = widget
+        while ancestor is not None:
+            self.path.append(ancestor)
+            ancestor = ancestor.parent
+        self.path.reverse()
+        if widget is not None:
+            widget.selected = True
+            # the focused widget is deselected by the next click elsewhere, also through the
+            # containers filtering the pointer events of their childs (e.g. sparse Grid)
+            self.ui_context._pointer_sticky.add(widget)
+            for parent, child in zip(self.path, self.path[1:]):
+                sticky = getattr(parent, "_pointer_sticky", None)
+                if sticky is not None:
+                    sticky.add(child)
+
+    def widget_selected(self, widget, selected):
+        """Called when the selected state of a widget of the context changes."""
+        if selected:
+            self.focus(widget)
+        elif widget is self.focused:
+            self.focus(None)
+
+    def tree_changed(self, widget, attached):
+        """Called when a widget joins or leaves the context."""
+        self._tab_order = None
+        if not attached:
+            if widget is self.focused:
+                self.focused, self.path = None, []
+            for holders in self.key_holders.values():
+                holders.discard(widget)
+
+    @property
+    def tab_order(self)-> list:
+        if self._tab_order is None:
+            order = []
+            stack = sorted(self.ui_context.widgets.values(), key=self.ui_context.registry.order, reverse=True)
+            while stack:
+                widget = stack.pop()
+                if widget.can_be_selected:
+                    order.append(widget)
+                stack.extend(child for child in reversed(widget.childs) if child)
+            self._tab_order = order
+        return self._tab_order
+
+    def focus_next(self, step=1):
+        """Move the focus to the next focusable widget (previous one with step=-1)."""
+        order = self.tab_order
+        if not order:
+            return
+        if self.focused in order:
+            index = (order.index(self.focused) + step) % len(order)
+        else:
+            index = 0 if step > 0 else len(order) - 1
+        self.focus(order[index])
+
+    def dispatch(self, event)-> bool:
+        """Deliver a keyboard event.
+
+        Args:
+            event (pygame.event.Event): A KEYDOWN, KEYUP, TEXTINPUT or TEXTEDITING event.
+
+        Returns:
+            bool: True if the event was consumed.
+        """
+
+        consumed = False
+        if event.type == pygame.KEYUP:
+            for holder in self.key_holders.pop(event.key, ()):
+                if holder is not self.focused:
+                    consumed = holder.handle_event(event, is_under_parent=False) or consumed
+
+        target = self.focused
+        if target is None:
+            return consumed
+        if event.type == pygame.KEYDOWN:
+            self.key_holders.setdefault(event.key, set()).add(target)
+
+        for ancestor in self.path[:-1]:
+            if ancestor.on_key_capture and ancestor.on_key_capture(ancestor, event):
+                return True
+        if target.handle_event(event, is_under_parent=False):
+            return True
+        for ancestor in reversed(self.path[:-1]):
+            if ancestor.on_key and ancestor.on_key(ancestor, event):
+                return True
+
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+            self.focus_next(-1 if event.mod & pygame.KMOD_SHIFT else 1)
+            return True
+        return consumed
@@ -0,0 +1,89 @@
+class GapBuffer:
+    """A list keeping free slots (the gap) at the last edit position, so that inserting or
+    deleting items near the previous edit only moves the items in between, wherever the
+    edit is in the list."""
+    def __init__(self, items=(), gap_size=64):
+        items = list(items)
+        self.min_gap_size = gap_size
+        self._items = items + [None] * gap_size
+        self._gap_start = len(items)
+        self._gap_end = len(self._items)
+
+    def __len__(self):
+        return len(self._items) - (self._gap_end - self._gap_start)
+
+    def _index(self, index)-> int:
+        """Convert an index of the list to an index of the storage."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("GapBuffer index out of range")
+        return index if index < self._gap_start else index + self._gap_end - self._gap_start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            gap_length = self._gap_end - self._gap_start
+            before = self._items[start:min(stop, self._gap_start)]
+            after = self._items[max(start, self._gap_start) + gap_length:max(stop, self._gap_start) + gap_length]
+            return before + after
+        return self._items[self._index(index)]
+
+    def __setitem__(self, index, item):
+        self._items[self._index(index)] = item
+
+    def __iter__(self):
+        yield from self._items[:self._gap_start]
+        yield from self._items[self._gap_end:]
+
+    def _move_gap(self, index):
+        """Move the gap before the item at index."""
+        if index < self._gap_start:
+            count = self._gap_start - index
+            self._items[self._gap_end - count:self._gap_end] = self._items[index:self._gap_start]
+            self._items[index:index + min(count, self._gap_end - self._gap_start)] = [None] * min(count, self._gap_end - self._gap_start)
+            self._gap_start -= count
+            self._gap_end -= count
+        elif index > self._gap_start:
+            count = index - self._gap_start
+            self._items[self._gap_start:self._gap_start + count] = self._items[self._gap_end:self._gap_end + count]
+            freed_start = max(self._gap_end, self._gap_start + count)
+            self._items[freed_start:self._gap_end + count] = [None] * (self._gap_end + count - freed_start)
+            self._gap_start += count
+            self._gap_end += count
+
+    def insert(self, index, items):
+        """Insert items before index.
+
+        Args:
+            index (int): The position of the first inserted item.
+            items (list): The items to insert.
+        """
+
+        if not 0 <= index <= len(self):
+            raise IndexError("GapBuffer index out of range")
+        self._move_gap(index)
+        missing = len(items) - (self._gap_end - self._gap_start)
+        if missing > 0:
+            # grow the gap proportionally to the size, for amortized constant time inserts
+            grow = max(missing + self.min_gap_size, len(self) // 8)
+            self._items[self._gap_end:self._gap_end] = [None] * grow
+            self._gap_end += grow
+        self._items[self._gap_start:self._gap_start + len(items)] = items
+        self._gap_start += len(items)
+
+    def append(self, item):
+        self.insert(len(self), [item])
+
+    def delete(self, start, stop):
+        """Delete the items from start to stop (excluded)."""
+        if not 0 <= start <= stop <= len(self):
+            raise IndexError("GapBuffer index out of range")
+        self._move_gap(stop)
+        self._items[start:stop] = [None] * (stop - start)
+        self._gap_start = start
+
+    def __repr__(self):
+        return f"GapBuffer({list(self)})"
@@ -2,19 +2,39 @@ import pygame
 
 from bazui.ui.widget import Widget
 from bazui.ui.link import get, LinkByMethod, LinkAttribute
+from bazui.surfaces import allocated
+
+GRID_TYPES = ("fixed_regular", "row_major", "column_major", "auto_flow")
+
+
+class CellPositions(dict):
+    """Links to the grid cell positions, created on first access."""
+    def __init__(self, grid):
+        super().__init__()
+        self.grid = grid
+
+    def __missing__(self, grid_pos):
+        link = LinkByMethod(self.grid, lambda grid, cell=grid_pos: grid.cell_pos(cell), watch=("pos", "margin", "padding"))
+        self[grid_pos] = link
+        return link
+
 
 class Grid(Widget):
+    link_dependencies = {"cell_size": ("size", "margin", "padding", "grid_shape")}
+
     def __init__(self, pos, size, name, app, grid_shape, **kwargs):
         super().__init__(pos, size, name, app)
 
         # grid attributes
         self.grid_shape = grid_shape
-        self.grid_poses = {}
+        self.grid_poses = CellPositions(self)
+        self.cells = {}  # grid position -> child, occupied cells only
 
         # attributes
         self.padding = 0  # padding between grid cells
         self.margin = 0   # margin between grid and widget border
-        self.grid_type = "fixed_regular"
+        self.grid_type = "fixed_regular"  # fixed_regular, row_major, column_major or auto_flow (row major, adding rows when full)
+        self.sparse = False  # childs only holds occupied cells, which are hit-tested arithmetically
 
         for key, value in kwargs.items():
             if hasattr(self, key):
@@ -22,46 +42,165 @@ class Grid(Widget):
             else:
                 raise AttributeError(f"Grid has no attribute {key}")
 
+        self._cell_size = LinkAttribute(self, "cell_size")  # memoized, see link_dependencies
+        self._next_free = 0  # flow index from which add_child looks for a free cell
+        self._pointer_targets = None
+        self._pointer_sticky = set()
+
         # grid setup
         self._grid_setup()
 
     def arrange(self):
-        if self.grid_type == "fixed_regular":
-            self.arrange_fixed_regular()
+        if self.grid_type not in GRID_TYPES:
+            raise ValueError(f"Invalid grid type: {self.grid_type}.")
+        self.arrange_fixed_regular()
 
     def _grid_setup(self):
-        self.childs = [None for _ in range(self.grid_shape[0] * self.grid_shape[1])]
+        if self.sparse:
+            self.childs = []
+        else:
+            self.childs = [None for _ in range(self.grid_shape[0] * self.grid_shape[1])]
         self.arrange()
 
         if self.has_surface:
-            self.surface = pygame.Surface(get(self.size), pygame.SRCALPHA)
+            self.surface = allocated(pygame.Surface(get(self.size), pygame.SRCALPHA))
 
     def arrange_fixed_regular(self):
-        # define cell size link
-        # def cell_size(self):
-        #     return ((get(self.size)[0] - 2 * self.margin - (self.grid_shape[0] - 1) * self.padding) / self.grid_shape[0],
-        #             (get(self.size)[1] - 2 * self.margin - (self.grid_shape[1] - 1) * self.padding) / self.grid_shape[1])
-        # cell_size = LinkByMethod(self, cell_size)
-        cell_size = LinkAttribute(self, "cell_size")
-
-        # define links to cell positions
-        for i in range(self.grid_shape[0]):
-            for j in range(self.grid_shape[1]):
-                def el_pos(self, i, j):
-                    return (get(self.pos)[0] + self.margin + i * (get(cell_size)[0] + self.padding),
-                             get(self.pos)[1] + self.margin + j * (get(cell_size)[1] + self.padding))
-                link_to_pos = LinkByMethod(self, lambda x, f=el_pos, gridx=i, gridy=j: f(x, gridx, gridy))
-                self.grid_poses[(i, j)] = link_to_pos
+        """Bind the occupied cells to their positions. Cell positions are computed
+        arithmetically by cell_pos, links are only created for the cells that are used."""
+
+        self.grid_poses = CellPositions(self)
+        for grid_pos, child in self.cells.items():
+            child.pos = self.grid_poses[grid_pos]
+
+    def cell_pos(self, grid_pos):
+        """Compute the position of a cell.
+
+        Args:
+            grid_pos (tuple[int, int]): The cell column and row.
+
+        Returns:
+            tuple[float, float]: The top left corner of the cell.
+        """
+
+        pos = get(self.pos)
+        cell_size = get(self._cell_size)
+        return (pos[0] + self.margin + grid_pos[0] * (cell_size[0] + self.padding),
+                pos[1] + self.margin + grid_pos[1] * (cell_size[1] + self.padding))
+
+    def cell_at(self, pos):
+        """Find the cell under a point.
+
+        Args:
+            pos (tuple[int, int]): The point.
+
+        Returns:
+            tuple[int, int] | None: The cell column and row, None on margins, paddings and outside the grid.
+        """
+
+        origin = get(self.pos)
+        cell_size = get(self._cell_size)
+        x = pos[0] - origin[0] - self.margin
+        y = pos[1] - origin[1] - self.margin
+        if x < 0 or y < 0:
+            return None
+        i = int(x // (cell_size[0] + self.padding))
+        j = int(y // (cell_size[1] + self.padding))
+        if i >= self.grid_shape[0] or j >= self.grid_shape[1]:
+            return None
+        if x - i * (cell_size[0] + self.padding) >= cell_size[0] or y - j * (cell_size[1] + self.padding) >= cell_size[1]:
+            return None
+        return (i, j)
 
     def grid_pos_to_list_pos(self, grid_pos):
         return grid_pos[0] + grid_pos[1] * self.grid_shape[0]
 
+    def flow_pos_to_grid_pos(self, flow_pos):
+        """Convert an index in the fill order of the grid type to a grid position."""
+        if self.grid_type == "column_major":
+            return (flow_pos // self.grid_shape[1], flow_pos % self.grid_shape[1])
+        return (flow_pos % self.grid_shape[0], flow_pos // self.grid_shape[0])
+
+    def grid_pos_to_flow_pos(self, grid_pos):
+        """Convert a grid position to an index in the fill order of the grid type."""
+        if self.grid_type == "column_major":
+            return grid_pos[0] * self.grid_shape[1] + grid_pos[1]
+        return grid_pos[0] + grid_pos[1] * self.grid_shape[0]
+
     def set_child(self, grid_pos, child=None):
-        self.childs[self.grid_pos_to_list_pos(grid_pos)] = child
+        previous = self.cells.pop(grid_pos, None)
+        if previous:
+            if self.sparse:
+                self.childs.remove(previous)
+            self._unindex_child(previous)
+            previous._invalidate_parent_surfaces()
+            previous.parent = None
+            previous.set_ui_context(None)
+            self._pointer_sticky.discard(previous)
+            if previous._drawn_rect is not None:
+                self._released_rects.append(previous._drawn_rect)
+            if not child:  # the freed cell is filled again by add_child
+                self._next_free = min(self._next_free, self.grid_pos_to_flow_pos(grid_pos))
+        if not self.sparse:
+            self.childs[self.grid_pos_to_list_pos(grid_pos)] = child
         if child:
+            self.cells[grid_pos] = child
+            if self.sparse:
+                self.childs.append(child)
             child.pos = self.grid_poses[grid_pos]
+            child.parent = self
+            self._index_child(child)
+            child.invalidate()
+            if self.ui_context is not None:
+                child.set_ui_context(self.ui_context)
         return child
 
+    def add_child(self, child):
+        """Place a child in the next free cell, following the grid type fill order.
+
+        Args:
+            child (Widget): The widget to add.
+
+        Returns:
+            Widget: The added widget.
+        """
+
+        while True:
+            grid_pos = self.flow_pos_to_grid_pos(self._next_free)
+            if grid_pos[0] >= self.grid_shape[0] or grid_pos[1] >= self.grid_shape[1]:
+                if self.grid_type != "auto_flow":
+                    raise IndexError(f"Grid {self.name} is full.")
+                self.add_row()
+                continue
+            self._next_free += 1
+            if grid_pos not in self.cells:
+                return self.set_child(grid_pos, child)
+
+    def add_row(self):
+        """Extend the grid by one row."""
+        self.grid_shape = (self.grid_shape[0], self.grid_shape[1] + 1)
+        if not self.sparse:
+            self.childs.extend(None for _ in range(self.grid_shape[0]))
+
+    def pointer_event_targets(self, event):
+        # in sparse mode, only the child of the cell under the pointer and the childs
+        # resetting a state receive the event
+        if not self.sparse or (self.ui_context is not None and self.ui_context.pointer_route is not None):
+            return super().pointer_event_targets(event)
+        targets = set(self._pointer_sticky)
+        child = self.cells.get(self.cell_at(event.pos))
+        if child:
+            targets.add(child)
+        self._pointer_targets = targets
+        return sorted(targets, key=self.child_position)  # drawing order, as Widget.pointer_event_targets
+
+    def handle_event(self, event, is_under_parent=True):
+        consumed = super().handle_event(event, is_under_parent)
+        if self._pointer_targets is not None:
+            self._pointer_sticky = {child for child in self._pointer_targets if child.needs_pointer_events()}
+            self._pointer_targets = None
+        return consumed
+
     @property
     def cell_size(self):
         return ((get(self.size)[0] - 2 * self.margin - (self.grid_shape[0] - 1) * self.padding) / self.grid_shape[0],
@@ -1,14 +1,21 @@
+import time
 import pygame
 from bazui.ui.widget import Widget
 from bazui.ui.link import get
+from bazui.library import fit_size
+from bazui.surfaces import allocated
 
 class Image(Widget):
+    render_attributes = Widget.render_attributes | {"image", "im_sizing", "r_image"}
+
     def __init__(self, pos, size, name, app, image, **kwargs):
         super().__init__(pos, size, name, app)
         self.image = image
 
         # customizable attributes
         self.im_sizing = "fitmin"   # image sizing (stretch, fitmin, fitmax, fixed)
+        self.rescale_delay = 0.15  # time (s) the size must stay stable before a smooth rescale
+        self.render_cache = True  # blit_image only reads render_attributes, update invalidates pending rescales
 
         for key, value in kwargs.items():
             if hasattr(self, key):
@@ -25,45 +32,90 @@ class Image(Widget):
 
 
     def _image_setup(self):
-        self.surface = pygame.Surface(get(self.size), pygame.SRCALPHA)
+        self.surface = allocated(pygame.Surface(get(self.size), pygame.SRCALPHA))
+        self._used_image = self.image
+        self._target_size = None  # widget size of the last render
+        self._resized_at = 0
+        self._smooth_pending = False  # a fast scale is displayed until the size settles
+        self.app.library.add_user(self.image, self)  # keeps the image from being evicted
+
+    def update(self):
+        if self._used_image != self.image:
+            self.app.library.remove_user(self._used_image, self)
+            self._used_image = self.image
+            self.app.library.add_user(self.image, self)
+            self.r_image = self.app.library[self.image]
+        # repaint once the image is available in the library
+        if self.r_image is None:
+            if self.image in self.app.library:
+                self.r_image = self.app.library[self.image]
+            elif self.rect.colliderect((0, 0), self.app.app_state.screen_size):
+                self.app.library.prioritize(self.image)  # visible images are loaded first
+        if self._smooth_pending and time.time() - self._resized_at >= self.rescale_delay:
+            self.invalidate()
+        super().update()
+
+    def next_frame_delay(self):
+        delay = super().next_frame_delay()
+        if self._smooth_pending:
+            smooth_delay = max(0, self._resized_at + self.rescale_delay - time.time())
+            delay = smooth_delay if delay is None else min(delay, smooth_delay)
+        return delay
 
     def blit_image(self, _):
 
         #check that the image is already loaded
         if self.image in self.app.library:
-            if self.r_image is None:
-                self.r_image = self.app.library[self.image]
-
             image = self.app.library[self.image]
+            size = get(self.size)
 
-            desired_size = None
-            if self.im_sizing == "stretch":
-                desired_size = get(self.size)
-            elif self.im_sizing == "fitmin":
-                # fit the image to the widget size, keeping the aspect ratio
-                desired_size = get(self.size)
-                image_ratio = image.get_width() / image.get_height()
-                widget_ratio = desired_size[0] / desired_size[1]
-                if image_ratio > widget_ratio:
-                    desired_size = (desired_size[0], int(desired_size[0] / image_ratio))
-                else:
-                    desired_size = (int(desired_size[1] * image_ratio), desired_size[1])
-            elif self.im_sizing == "fitmax":
-                # fit the image to the widget size, keeping the aspect ratio
-                desired_size = get(self.size)
-                image_ratio = image.get_width() / image.get_height()
-                widget_ratio = desired_size[0] / desired_size[1]
-                if image_ratio < widget_ratio:
-                    desired_size = (desired_size[0], int(desired_size[0] / image_ratio))
-                else:
-                    desired_size = (int(desired_size[1] * image_ratio), desired_size[1])
-            elif self.im_sizing == "fixed":
-                self.r_image = image
-            else:
-                raise ValueError(f"Invalid image sizing method: {self.im_sizing}.")
+            now = time.time()
+            if self._target_size is not None and tuple(size) != self._target_size:
+                self._resized_at = now
+            self._target_size = tuple(size)
 
-            if desired_size and desired_size != self.r_image.get_size():
-                self.r_image = pygame.transform.smoothscale(image, desired_size)
+            if self.im_sizing != "fixed" and now - self._resized_at < self.rescale_delay:
+                # the size is changing (e.g. window drag): fast scale until it settles
+                desired_size = fit_size(image.get_size(), size, self.im_sizing)
+                self.r_image = allocated(pygame.transform.scale(self.app.library.mipmap_source(self.image, desired_size, image), desired_size))
+                self._smooth_pending = True
+            else:
+                self.r_image = self.app.library.get_scaled(self.image, size, self.im_sizing)
+                self._smooth_pending = False
 
-            im_pos = (get(self.size)[0] / 2 - self.r_image.get_width() / 2, get(self.size)[1] / 2 - self.r_image.get_height() / 2)
+            im_pos = (size[0] / 2 - self.r_image.get_width() / 2, size[1] / 2 - self.r_image.get_height() / 2)
             self.surface.blit(self.r_image, im_pos)
+
+
+class IconSet(Widget):
+    """Draws many small library images, at fixed positions, with a single batched blit.
+    Works best with the library atlas enabled."""
+    render_attributes = Widget.render_attributes | {"icons"}
+
+    def __init__(self, pos, size, name, app, icons, **kwargs):
+        super().__init__(pos, size, name, app)
+        self.icons = icons  # list of (image name, position relative to the widget)
+        self.render_cache = True  # blit_icons is invalidated by update when icons load
+
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+            else:
+                raise AttributeError(f"IconSet has no attribute {key}")
+
+        # forced attributes
+        self.has_surface = True
+        self.render_method = self.blit_icons
+        self.surface = allocated(pygame.Surface(get(self.size), pygame.SRCALPHA))
+        self._drawn_icons = 0  # number of icons available at the last render
+
+    def update(self):
+        # repaint when icons finish loading (or are released), missing icons do not keep repainting
+        if self._drawn_icons != sum(icon in self.app.library for icon, _ in self.icons):
+            self.invalidate()
+        super().update()
+
+    def blit_icons(self, _):
+        if self.background_color is None:
+            self.surface.fill((0, 0, 0, 0))
+        self._drawn_icons = self.app.library.blit_many(self.surface, self.icons)
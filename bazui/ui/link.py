@@ -1,22 +1,121 @@
+import weakref
+
+_evaluating = []  # stack of the links being computed, used to record dependencies
+
+
+class Observable:
+    """Object whose attribute changes invalidate the memoized links reading them.
+    Only assignments are observed: mutating a value in place (e.g. a list) is not detected."""
+
+    # properties computed from other attributes, mapped to the attributes they read
+    link_dependencies = {}
+
+    def __setattr__(self, key, value):
+        observers = self.__dict__.get("_link_observers")
+        if observers is not None and key in observers and self.__dict__.get(key) != value:
+            object.__setattr__(self, key, value)
+            for link in list(observers[key]):
+                link.invalidate()
+            return
+        object.__setattr__(self, key, value)
+
+    def observe(self, attr, link)-> bool:
+        """Invalidate a link whenever an attribute is assigned a new value.
+
+        Args:
+            attr (str): The observed attribute (or property listed in link_dependencies).
+            link (Link): The link to invalidate.
+
+        Returns:
+            bool: False if the attribute cannot be observed: a property (or other descriptor)
+                not listed in link_dependencies is computed on access, not assigned.
+        """
+
+        if attr not in self.link_dependencies and hasattr(type(getattr(type(self), attr, None)), "__get__"):
+            return False
+        observers = self.__dict__.get("_link_observers")
+        if observers is None:
+            observers = {}
+            object.__setattr__(self, "_link_observers", observers)
+        for name in self.link_dependencies.get(attr, (attr,)):
+            observers.setdefault(name, weakref.WeakSet()).add(link)
+        return True
+
 
 class Link:
+    """Value computed from other objects. The value is memoized until one of its sources
+    changes: observed attributes push invalidation to the links reading them, and links
+    evaluated while computing another link become its upstream dependencies.
+    Links that cannot be observed are recomputed on every access, as are their dependents."""
+    memoizable = False
+
+    def __init__(self):
+        self._value = None
+        self._valid = False
+        self._volatile = False
+        self._dependents = weakref.WeakSet()
+
     def get(self):
+        if _evaluating:
+            self._dependents.add(_evaluating[-1])
+        if self._valid:
+            return self._value
+
+        _evaluating.append(self)
+        self._volatile = not self.memoizable
+        try:
+            value = self.compute()
+        finally:
+            _evaluating.pop()
+
+        if self._volatile:
+            if _evaluating:
+                _evaluating[-1]._volatile = True
+        else:
+            self._value = value
+            self._valid = True
+        return value
+
+    def compute(self):
         pass
 
+    def invalidate(self):
+        """Drop the memoized value of the link and of every link depending on it."""
+        if not self._valid:
+            return
+        self._valid = False
+        self._value = None
+        for link in list(self._dependents):
+            link.invalidate()
+
 class LinkAttribute(Link):
     def __init__(self, ref, attr):
+        super().__init__()
         self.ref = ref
         self.attr = attr
+        if isinstance(ref, Observable):
+            self.memoizable = ref.observe(attr, self)
 
-    def get(self):
+    def compute(self):
         return get(getattr(self.ref, self.attr))
 
 class LinkByMethod(Link):
-    def __init__(self, ref, method):
+    def __init__(self, ref, method, watch=None):
+        """
+        Args:
+            ref: The object passed to the method.
+            method (callable): Computes the value from ref.
+            watch (tuple[str], optional): The attributes of ref read by the method. The value is
+                memoized only if they are given, ref is Observable and they can be observed
+                (see Observable.observe). Defaults to None.
+        """
+        super().__init__()
         self.ref = ref
         self.method = method
+        if watch is not None and isinstance(ref, Observable):
+            self.memoizable = all([ref.observe(attr, self) for attr in watch])
 
-    def get(self):
+    def compute(self):
         return get(self.method(self.ref))
 
 
@@ -0,0 +1,483 @@
+import time
+from collections import OrderedDict
+import pygame
+from bazui.ui.widget import Widget
+from bazui.ui.link import get
+from bazui.ui.gap_buffer import GapBuffer
+from bazui.ui.undo import UndoHistory
+from bazui.fonts import get_font
+from bazui.ui.text import measure_prefix_widths, previous_word_boundary, next_word_boundary, closest_boundary
+from bazui.surfaces import allocated
+
+
+def end_of_insert(pos, text):
+    """Return the position after a text inserted at pos."""
+    pieces = text.split("\n")
+    if len(pieces) == 1:
+        return pos[0], pos[1] + len(text)
+    return pos[0] + len(pieces) - 1, len(pieces[-1])
+
+
+class MultiLineText(Widget):
+    """Editable text of many lines (logs, configuration files). The lines are stored in a gap buffer
+    and only the visible ones are measured and rendered, so that editing and scrolling cost the same
+    at any line. Positions in the text are (line, column) tuples."""
+    render_attributes = Widget.render_attributes | {"text_color", "cursor_pos", "cursor_color", "cursor_visible",
+                                                    "selection_start", "selection_end", "selection_color",
+                                                    "scroll_x", "scroll_y"}
+
+    def __init__(self, pos, size, name, app, **kwargs):
+        super().__init__(pos, size, name, app)
+
+        # text storage
+        self.lines = GapBuffer([""])
+        self.cursor_pos = (0, 0)
+        self.selection_start = None
+        self.selection_end = None
+        self.scroll_x = 0
+        self.scroll_y = 0
+        self._line_cache = OrderedDict()  # line text -> [render or None, prefix widths or None], least recently used first
+
+        # customisable attributes
+        self.font = get_font()  # shared fonts, see bazui.fonts
+        text = kwargs.pop("text", "")  # set once the undo history is built
+        self.text_color = (255, 255, 255)
+        self.editable = False
+        self.selectable = False
+        self.cursor_color = (255, 255, 255)
+        self.selection_color = "#264F78"
+        self.redo_stack_max_size = 20
+        self.undo_stack_max_size = 20
+        self.tab_text = "    "
+        self.line_cache_size = 512  # number of distinct line texts kept measured and rendered
+        self.render_cache = True  # access_surface only reads render_attributes, edits invalidate the widget
+
+        self.background_color = (0, 0, 0, 0)
+        self.on_drag = self.base_comportment_when_dragged
+
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+            else:
+                raise AttributeError(f"MultiLineText has no attribute {key}")
+
+        # forced attributes
+        self.has_surface = True
+        self.surface = allocated(pygame.Surface(get(self.size), pygame.SRCALPHA))
+        self.can_be_dragged = self.selectable
+        self.line_height = self.font.get_linesize()
+        self._line_cache_color = self.text_color  # color the cached renders were made with
+        self._preferred_x = None  # x the cursor keeps when moving up and down
+        self._scrolled_cursor = None  # cursor position the scroll was last adjusted to
+        self.history = UndoHistory(end_of_insert, self.undo_stack_max_size, self.redo_stack_max_size)
+        self.repeatable_event = None
+        self.repeatable_first_activated = 0
+        self.repeatable_last_activated = 0
+        self.time_at_update = 0
+        self.cursor_visible = False
+
+        self.set_text(text)
+
+    @property
+    def text(self)-> str:
+        return "\n".join(self.lines)
+
+    @text.setter
+    def text(self, text):
+        self.set_text(text)
+
+    def set_text(self, text):
+        """Replace the whole text. The undo history is cleared."""
+        self.lines = GapBuffer(text.split("\n"))
+        self.cursor_pos = self.bound_pos(self.cursor_pos)
+        self.reset_selection()
+        self.history.clear()
+        self._text_changed()
+
+    def _text_changed(self):
+        self.time_at_update = time.time()
+        self.invalidate()
+
+    def bound_pos(self, pos):
+        line = max(0, min(pos[0], len(self.lines) - 1))
+        return line, max(0, min(pos[1], len(self.lines[line])))
+
+    def get_range(self, start, end)-> str:
+        """Return the text between two positions."""
+        (start_line, start_col), (end_line, end_col) = sorted((start, end))
+        if start_line == end_line:
+            return self.lines[start_line][start_col:end_col]
+        return "\n".join([self.lines[start_line][start_col:]] + self.lines[start_line + 1:end_line]
+                         + [self.lines[end_line][:end_col]])
+
+    # editing
+
+    def insert_text(self, pos, text, record=True):
+        """Insert a text, which may contain new lines.
+
+        Args:
+            pos (tuple[int, int]): Where to insert the text.
+            text (str): The text.
+            record (bool, optional): Add the edit to the undo history. Defaults to True.
+
+        Returns:
+            tuple[int, int]: The position after the inserted text.
+        """
+
+        line, col = pos
+        current = self.lines[line]
+        pieces = text.split("\n")
+        if len(pieces) == 1:
+            self.lines[line] = current[:col] + text + current[col:]
+        else:
+            self.lines[line] = current[:col] + pieces[0]
+            pieces[-1] += current[col:]
+            self.lines.insert(line + 1, pieces[1:])
+        if record:
+            self.history.record("insert", pos, text, self.cursor_pos)
+        self._text_changed()
+        return end_of_insert(pos, text)
+
+    def delete_range(self, start, end, record=True, coalesce=True)-> str:
+        """Delete the text between two positions.
+
+        Args:
+            start (tuple[int, int]): A bound of the deleted text.
+            end (tuple[int, int]): The other bound.
+            record (bool, optional): Add the edit to the undo history. Defaults to True.
+            coalesce (bool, optional): Allow merging the edit into the last undo step. Defaults to True.
+
+        Returns:
+            str: The deleted text.
+        """
+
+        start, end = sorted((start, end))
+        if start == end:
+            return ""
+        removed = self.get_range(start, end)
+        (start_line, start_col), (end_line, end_col) = start, end
+        self.lines[start_line] = self.lines[start_line][:start_col] + self.lines[end_line][end_col:]
+        self.lines.delete(start_line + 1, end_line + 1)
+        if record:
+            self.history.record("delete", start, removed, self.cursor_pos, coalesce)
+        self._text_changed()
+        return removed
+
+    def write(self, text_input):
+        if self.selection_start is not None:
+            self.delete_selection()
+        self.cursor_pos = self.insert_text(self.cursor_pos, text_input)
+
+    def delete_selection(self):
+        start = min(self.selection_start, self.selection_end)
+        self.delete_range(self.selection_start, self.selection_end, coalesce=False)
+        self.cursor_pos = start
+        self.reset_selection()
+
+    def delete(self):
+        if self.selection_start is not None:
+            self.delete_selection()
+            return
+        start = self.previous_pos(self.cursor_pos)
+        self.delete_range(start, self.cursor_pos)
+        self.cursor_pos = start
+
+    def suppress(self):
+        if self.selection_start is not None:
+            self.delete_selection()
+            return
+        self.delete_range(self.cursor_pos, self.next_pos(self.cursor_pos))
+
+    def delete_group(self, start, end):
+        """Deletes the text between two positions and moves the cursor to its start."""
+        self.delete_range(start, end, coalesce=False)
+        self.cursor_pos = min(start, end)
+        self.reset_selection()
+
+    # undo
+
+    def _apply(self, operation, reverse):
+        kind, pos, text = operation
+        if (kind == "insert") != reverse:
+            return self.insert_text(pos, text, record=False)
+        self.delete_range(pos, end_of_insert(pos, text), record=False)
+        return pos
+
+    def undo(self):
+        cursor_pos = self.history.undo(self._apply)
+        if cursor_pos is not None:
+            self.cursor_pos = self.bound_pos(cursor_pos)
+            self.reset_selection()
+
+    def redo(self):
+        cursor_pos = self.history.redo(self._apply)
+        if cursor_pos is not None:
+            self.cursor_pos = cursor_pos
+            self.reset_selection()
+
+    # navigation
+
+    def previous_pos(self, pos):
+        if pos[1] > 0:
+            return pos[0], pos[1] - 1
+        if pos[0] > 0:
+            return pos[0] - 1, len(self.lines[pos[0] - 1])
+        return pos
+
+    def next_pos(self, pos):
+        if pos[1] < len(self.lines[pos[0]]):
+            return pos[0], pos[1] + 1
+        if pos[0] < len(self.lines) - 1:
+            return pos[0] + 1, 0
+        return pos
+
+    def crtl_get_prec(self):
+        """Finds the precedent word-space transition, at the end of the previous line from a line start."""
+        line, col = self.cursor_pos
+        if col == 0:
+            return self.previous_pos(self.cursor_pos)
+        return line, previous_word_boundary(self.lines[line], col)
+
+    def ctrl_get_next(self):
+        """Finds the next word-space transition, at the start of the next line from a line end."""
+        line, col = self.cursor_pos
+        if col == len(self.lines[line]):
+            return self.next_pos(self.cursor_pos)
+        return line, next_word_boundary(self.lines[line], col)
+
+    def vertical_pos(self, line_offset):
+        """Return the cursor position some lines above or below, keeping the cursor x."""
+        x = self._preferred_x if self._preferred_x is not None else self.line_widths(self.cursor_pos[0])[self.cursor_pos[1]]
+        line = max(0, min(self.cursor_pos[0] + line_offset, len(self.lines) - 1))
+        return line, closest_boundary(self.line_widths(line), x)
+
+    def navigation_target(self, key, ctrl):
+        """Return the cursor position a navigation key moves to, None if the key is not a navigation key."""
+        line, col = self.cursor_pos
+        page = max(1, get(self.size)[1] // self.line_height)
+        if key == pygame.K_LEFT:
+            return self.crtl_get_prec() if ctrl else self.previous_pos(self.cursor_pos)
+        if key == pygame.K_RIGHT:
+            return self.ctrl_get_next() if ctrl else self.next_pos(self.cursor_pos)
+        if key in (pygame.K_UP, pygame.K_DOWN, pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+            offset = {pygame.K_UP: -1, pygame.K_DOWN: 1, pygame.K_PAGEUP: -page, pygame.K_PAGEDOWN: page}[key]
+            return self.vertical_pos(offset)
+        if key == pygame.K_HOME:
+            return (0, 0) if ctrl else (line, 0)
+        if key == pygame.K_END:
+            return (len(self.lines) - 1, len(self.lines[-1])) if ctrl else (line, len(self.lines[line]))
+        return None
+
+    def move_cursor(self, pos, select=False, vertical=False):
+        """Move the cursor, extending the selection or resetting it."""
+        if select:
+            if self.selection_start is None:
+                self.selection_start = self.cursor_pos
+            self.selection_end = pos
+        else:
+            self.reset_selection()
+        if vertical:
+            if self._preferred_x is None:
+                self._preferred_x = self.line_widths(self.cursor_pos[0])[self.cursor_pos[1]]
+        else:
+            self._preferred_x = None
+        self.cursor_pos = pos
+
+    def reset_selection(self):
+        self.selection_start = None
+        self.selection_end = None
+
+    # layout
+
+    def _line_entry(self, text):
+        if self._line_cache_color != self.text_color:
+            self._line_cache.clear()
+            self._line_cache_color = self.text_color
+        entry = self._line_cache.get(text)
+        if entry is None:
+            entry = self._line_cache[text] = [None, None]
+            if len(self._line_cache) > self.line_cache_size:
+                self._line_cache.popitem(last=False)
+        else:
+            self._line_cache.move_to_end(text)
+        return entry
+
+    def line_widths(self, line)-> list[int]:
+        """Return the prefix widths of a line (see measure_prefix_widths)."""
+        entry = self._line_entry(self.lines[line])
+        if entry[1] is None:
+            entry[1] = measure_prefix_widths(self.font, self.lines[line])
+        return entry[1]
+
+    def line_render(self, line)-> pygame.Surface:
+        entry = self._line_entry(self.lines[line])
+        if entry[0] is None:
+            entry[0] = allocated(self.font.render(self.lines[line], True, self.text_color))
+        return entry[0]
+
+    def visible_lines(self)-> range:
+        first = int(self.scroll_y // self.line_height)
+        last = int((self.scroll_y + get(self.size)[1]) // self.line_height) + 1
+        return range(max(0, first), min(len(self.lines), last))
+
+    def mouse_to_cursor(self, pos):
+        widget_pos = get(self.pos)
+        line = int((pos[1] - widget_pos[1] + self.scroll_y) // self.line_height)
+        line = max(0, min(line, len(self.lines) - 1))
+        return line, closest_boundary(self.line_widths(line), pos[0] - widget_pos[0] + self.scroll_x)
+
+    def scroll_to(self, scroll_x, scroll_y):
+        max_scroll_y = max(0, len(self.lines) * self.line_height - get(self.size)[1])
+        self.scroll_x = max(0, scroll_x)
+        self.scroll_y = max(0, min(scroll_y, max_scroll_y))
+
+    def scroll_to_cursor(self):
+        """Scroll so that the cursor is visible."""
+        width, height = get(self.size)
+        line, col = self.cursor_pos
+        cursor_x = self.line_widths(line)[col]
+        cursor_y = line * self.line_height
+        scroll_x = max(min(self.scroll_x, cursor_x), cursor_x + 2 - width)  # room for the cursor
+        scroll_y = max(min(self.scroll_y, cursor_y), cursor_y + self.line_height - height)
+        self.scroll_to(scroll_x, scroll_y)
+        self._scrolled_cursor = self.cursor_pos
+
+    # events
+
+    def handle_event(self, event, is_under_parent=True):
+        return_code = super().handle_event(event, is_under_parent)
+
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button <= 3 and self.selected:
+            self.move_cursor(self.mouse_to_cursor(event.pos))
+            return 1
+
+        if event.type == pygame.MOUSEBUTTONDOWN and self.selection_start is not None:
+            if not self.rect.collidepoint(event.pos):
+                self.reset_selection()
+
+        if event.type == pygame.MOUSEWHEEL and self.hovered:
+            self.scroll_to(self.scroll_x + event.x * 20, self.scroll_y - event.y * 3 * self.line_height)
+
+        if self.editable:
+
+            if event.type == pygame.KEYUP:
+                if self.repeatable_event and self.repeatable_event.key == event.key:
+                    self.repeatable_event = None
+                    self.repeatable_first_activated = 0
+                    self.repeatable_last_activated = 0
+
+            if event.type == pygame.KEYDOWN and self.selected:
+                mods = pygame.key.get_mods()
+                ctrl, shift = mods & pygame.KMOD_CTRL, mods & pygame.KMOD_SHIFT
+                target = self.navigation_target(event.key, ctrl)
+                if target is not None: # ARROWS, HOME, END, PAGE UP, PAGE DOWN (+ SHIFT: select, + CTRL: by word / whole text)
+                    vertical = event.key in (pygame.K_UP, pygame.K_DOWN, pygame.K_PAGEUP, pygame.K_PAGEDOWN)
+                    self.move_cursor(target, select=shift, vertical=vertical)
+                    self.set_repeatable(event)
+                    return 1
+                if ctrl:
+                    if event.key == pygame.K_z: # CTRL + Z (undo)
+                        self.undo()
+                    if event.key == pygame.K_y: # CTRL + Y (redo)
+                        self.redo()
+                    if event.key == pygame.K_a: # CTRL + A (select all)
+                        self.selection_start = (0, 0)
+                        self.selection_end = self.cursor_pos = (len(self.lines) - 1, len(self.lines[-1]))
+                    if event.key == pygame.K_BACKSPACE: # CTRL + BACKSPACE (delete selection or word to the left)
+                        if self.selection_start is not None:
+                            self.delete_selection()
+                        else:
+                            self.delete_group(self.crtl_get_prec(), self.cursor_pos)
+                    if event.key == pygame.K_DELETE: # CTRL + DELETE (delete selection or word to the right)
+                        if self.selection_start is not None:
+                            self.delete_selection()
+                        else:
+                            self.delete_group(self.cursor_pos, self.ctrl_get_next())
+                    self.set_repeatable(event)
+                    return 1
+                if event.key == pygame.K_BACKSPACE: # BACKSPACE
+                    self.delete()
+                elif event.key == pygame.K_DELETE: # DELETE
+                    self.suppress()
+                elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER): # ENTER
+                    self.write("\n")
+                elif event.key == pygame.K_TAB: # TAB
+                    self.write(self.tab_text)
+                elif event.unicode not in ['¨', '^', '']: # ANY (char)
+                    self.write(event.unicode)
+                else:
+                    return return_code
+                self.reset_selection()
+                self._preferred_x = None
+                self.set_repeatable(event)
+                return 1
+
+        return return_code
+
+    def needs_pointer_events(self):
+        # a click outside the text has to reset the selection
+        return super().needs_pointer_events() or self.selection_start is not None
+
+    def set_repeatable(self, event):
+        if self.repeatable_event != event:
+            self.repeatable_event = event
+            self.repeatable_first_activated = time.time()
+            self.repeatable_last_activated = time.time()
+
+            if event is not None:
+                self.history.new_step()
+
+    def next_frame_delay(self):
+        now = time.time()
+        delays = [super().next_frame_delay()]
+        if self.repeatable_event:
+            delays.append(max(0, max(self.repeatable_first_activated + 0.5, self.repeatable_last_activated + 0.04) - now))
+        if self.selected and self.editable:
+            delays.append(0.5 - (now - self.time_at_update) % 0.5)  # next cursor blink
+        return min((delay for delay in delays if delay is not None), default=None)
+
+    def update(self):
+        if self.repeatable_event:
+            if time.time() - self.repeatable_last_activated > 0.04 and time.time() - self.repeatable_first_activated > 0.5:
+                self.repeatable_last_activated = time.time()
+                self.handle_event(self.repeatable_event, is_under_parent=False)
+        if self.cursor_pos != self._scrolled_cursor and (self.editable or self.selection_start is not None):
+            self.scroll_to_cursor()
+        # cursor blinking
+        self.cursor_visible = self.selected and self.editable and (time.time() - self.time_at_update) % 1 < 0.5
+        super().update()
+
+    def access_surface(self):
+        # clear surface
+        super().access_surface()
+        selection = None
+        if self.selection_start is not None:
+            selection = sorted((self.bound_pos(self.selection_start), self.bound_pos(self.selection_end)))
+        blits = []
+        for line in self.visible_lines():
+            y = line * self.line_height - self.scroll_y
+            # render selection, the line end included for lines selected past their end
+            if selection is not None and selection[0][0] <= line <= selection[1][0]:
+                widths = self.line_widths(line)
+                start_x = widths[selection[0][1]] if line == selection[0][0] else 0
+                end_x = widths[selection[1][1]] if line == selection[1][0] else widths[-1] + self.line_height // 3
+                pygame.draw.rect(self.surface, self.selection_color, (start_x - self.scroll_x, y, end_x - start_x, self.line_height))
+            if self.lines[line]:
+                blits.append((self.line_render(line), (-self.scroll_x, y)))
+        # render text
+        self.surface.blits(blits, doreturn=False)
+        # render cursor
+        if self.cursor_visible:
+            line, col = self.cursor_pos
+            cursor_x = self.line_widths(line)[col] - self.scroll_x
+            pygame.draw.rect(self.surface, self.cursor_color, (cursor_x, line * self.line_height - self.scroll_y, 2, self.line_height))
+
+        return self.surface
+
+    def base_comportment_when_dragged(self):
+        mouse_pos = self.app.app_state.mouse_pos
+        crt_cursor_pos = self.mouse_to_cursor(mouse_pos)
+        if self.selection_start is None:
+            self.selection_start = self.cursor_pos
+        self.cursor_pos = crt_cursor_pos
+        self.selection_end = self.cursor_pos
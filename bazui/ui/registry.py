@@ -0,0 +1,110 @@
+import heapq
+
+
+class WidgetRegistry:
+    """Indexes the widgets of a UIContext by id, by name and by identity.
+    Top level widgets get an id, nested childs are indexed too and resolve to the id
+    of their top level widget. Ids of removed widgets are reused."""
+    def __init__(self):
+        self.widgets = {}  # id -> top level widget, in insertion (drawing) order
+        self.next_id = 0  # smallest id never used
+        self._free_ids = []  # heap of released ids
+        self._ids = {}  # top level widget -> id
+        self._order = {}  # top level widget -> insertion counter
+        self._counter = 0
+        self._entries = {}  # widget (any depth) -> (id of its top level widget, name index it is stored in)
+        self._top_names = {}  # name -> top level widgets
+        self._nested_names = {}  # name -> nested widgets
+
+    def add(self, widget)-> int:
+        """Register a top level widget.
+
+        Args:
+            widget (Widget): The widget to register.
+
+        Returns:
+            int: The id given to the widget.
+        """
+
+        if self._free_ids:
+            widget_id = heapq.heappop(self._free_ids)
+        else:
+            widget_id = self.next_id
+            self.next_id += 1
+        self.widgets[widget_id] = widget
+        self._ids[widget] = widget_id
+        self._order[widget] = self._counter
+        self._counter += 1
+        return widget_id
+
+    def remove(self, widget_id):
+        """Unregister a top level widget and release its id.
+
+        Args:
+            widget_id (int): The id of the widget.
+
+        Returns:
+            Widget: The removed widget.
+
+        Raises:
+            KeyError: If no widget has this id.
+        """
+
+        widget = self.widgets.pop(widget_id)
+        del self._ids[widget]
+        del self._order[widget]
+        heapq.heappush(self._free_ids, widget_id)
+        return widget
+
+    def attach(self, widget):
+        """Index a widget of the context (top level or nested). Its parent has to be set."""
+
+        root = widget
+        while root.parent is not None:
+            root = root.parent
+        names = self._top_names if root is widget else self._nested_names
+        self._entries[widget] = (self._ids.get(root), names)
+        names.setdefault(widget.name, []).append(widget)
+
+    def detach(self, widget):
+        """Remove a widget (top level or nested) from the indexes."""
+
+        entry = self._entries.pop(widget, None)
+        if entry is not None:
+            self._unindex_name(entry[1], widget, widget.name)
+
+    def rename(self, widget, old_name, new_name):
+        """Update the name index after a widget was renamed."""
+
+        entry = self._entries.get(widget)
+        if entry is not None:
+            self._unindex_name(entry[1], widget, old_name)
+            entry[1].setdefault(new_name, []).append(widget)
+
+    @staticmethod
+    def _unindex_name(names, widget, name):
+        widgets = names.get(name)
+        if widgets is not None and widget in widgets:
+            widgets.remove(widget)
+            if not widgets:
+                del names[name]
+
+    def getbyname(self, name):
+        """Return a widget by name, top level widgets first. None if not found."""
+
+        widgets = self._top_names.get(name) or self._nested_names.get(name)
+        return widgets[0] if widgets else None
+
+    def getid(self, widget):
+        """Return the id of a widget, or of the top level widget containing it. None if not found."""
+
+        entry = self._entries.get(widget)
+        return entry[0] if entry is not None else self._ids.get(widget)
+
+    def order(self, widget)-> int:
+        """Return a key sorting top level widgets in drawing order."""
+
+        return self._order[widget]
+
+    def __contains__(self, widget):
+        return widget in self._entries or widget in self._ids
@@ -0,0 +1,81 @@
+import pygame
+
+
+class SpatialIndex:
+    """Uniform grid over rects, used to find the items lying under a point
+    without testing every item."""
+    def __init__(self, cell_size=64, max_cells_per_item=256):
+        self.cell_size = cell_size
+        self.max_cells_per_item = max_cells_per_item  # bigger items are tested on every query
+        self._cells = {}  # (cell_x, cell_y) -> set of items
+        self._large_items = set()
+        self._rects = {}  # item -> indexed rect
+
+    def _cell_range(self, rect):
+        return (rect.left // self.cell_size, rect.top // self.cell_size,
+                (rect.right - 1) // self.cell_size, (rect.bottom - 1) // self.cell_size)
+
+    def insert(self, item, rect: pygame.Rect):
+        """Add an item to the index, or move it if it is already indexed.
+
+        Args:
+            item: The indexed object.
+            rect (pygame.Rect): The area covered by the item.
+        """
+
+        if item in self._rects:
+            if self._rects[item] == rect:
+                return
+            self.remove(item)
+        rect = pygame.Rect(rect)
+        self._rects[item] = rect
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        x0, y0, x1, y1 = self._cell_range(rect)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > self.max_cells_per_item:
+            self._large_items.add(item)
+            return
+        for cell_x in range(x0, x1 + 1):
+            for cell_y in range(y0, y1 + 1):
+                self._cells.setdefault((cell_x, cell_y), set()).add(item)
+
+    def remove(self, item):
+        """Remove an item from the index. Unknown items are ignored.
+
+        Args:
+            item: The indexed object.
+        """
+
+        rect = self._rects.pop(item, None)
+        if rect is None or rect.width <= 0 or rect.height <= 0:
+            return
+        if item in self._large_items:
+            self._large_items.discard(item)
+            return
+        x0, y0, x1, y1 = self._cell_range(rect)
+        for cell_x in range(x0, x1 + 1):
+            for cell_y in range(y0, y1 + 1):
+                cell = self._cells.get((cell_x, cell_y))
+                if cell is not None:
+                    cell.discard(item)
+                    if not cell:
+                        del self._cells[(cell_x, cell_y)]
+
+    def query_point(self, pos) -> set:
+        """Find the items whose rect contains a point.
+
+        Args:
+            pos (tuple[int, int]): The point.
+
+        Returns:
+            set: The items under the point.
+        """
+
+        cell = self._cells.get((int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size), ())
+        return {item for item in (*cell, *self._large_items) if self._rects[item].collidepoint(pos)}
+
+    def __contains__(self, item):
+        return item in self._rects
+
+    def __len__(self):
+        return len(self._rects)
@@ -1,16 +1,158 @@
 import time
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
 from string import ascii_letters as al
 import pygame
 from bazui.ui.widget import Widget
 from bazui.ui.link import get
+from bazui.ui.undo import UndoHistory
+from bazui.fonts import get_font, render_text
+from bazui.surfaces import allocated
+
+PREFIX_ANCHOR_STEP = 32  # characters of a measured span of text
+PREFIX_EXACT_STEP = 512  # characters between two measurements of the whole prefix
+
+def common_prefix_length(text_a, text_b)-> int:
+    """Return the length of the common start of two strings."""
+    low, high = 0, min(len(text_a), len(text_b))
+    while low < high:  # slice comparisons run in C, a binary search keeps them few
+        mid = (low + high + 1) // 2
+        if text_a[:mid] == text_b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def measure_prefix_widths(font, text, widths=None, unchanged=0, unchanged_end=0)-> list[int]:
+    """Measure the width of every prefix of a text. Glyph advances are integers while the font
+    places glyphs with subpixel precision and kerning, so the width is measured every
+    PREFIX_ANCHOR_STEP characters and the advances in between are scaled to match it. Measuring
+    every prefix from the start of the text would be quadratic: the width is measured from the
+    last exact anchor, and only every PREFIX_EXACT_STEP characters and at the end of the edit
+    from the start of the text, so that the rounding of the measures does not add up.
+
+    Args:
+        font (pygame.font.Font): The font the text is rendered with.
+        text (str): The text.
+        widths (list[int], optional): The widths of a previous version of the text. Defaults to None.
+        unchanged (int, optional): Length of the start of the text that did not change since that
+            version, whose widths are kept. Defaults to 0.
+        unchanged_end (int, optional): Length of the end of the text that did not change since that
+            version, whose widths are shifted by the width change of the edit. Defaults to 0.
+
+    Returns:
+        list[int]: The width of text[:i] for i in 0..len(text).
+    """
+
+    old_widths = widths or [0]
+    first = min(unchanged, len(old_widths) - 1)
+    stop = len(text) - unchanged_end if widths else len(text)
+    widths = old_widths[:first + 1]
+    exact = first  # last index whose width was measured from the start of the text
+    metrics = font.metrics(text[first:stop])
+    for start in range(first, stop, PREFIX_ANCHOR_STEP):
+        end = min(start + PREFIX_ANCHOR_STEP, stop)
+        advances = [metric[4] if metric is not None else font.size(char)[0]
+                    for metric, char in zip(metrics[start - first:end - first], text[start:end])]
+        anchor = widths[-1]
+        if end == stop or end // PREFIX_EXACT_STEP > start // PREFIX_EXACT_STEP:
+            target = font.size(text[:end])[0]
+            exact = end
+        else:
+            target = widths[exact] + font.size(text[exact:end])[0]
+        scale = (target - anchor) / (sum(advances) or 1)
+        widths.extend(anchor + round(width * scale) for width in accumulate(advances))
+    if stop < len(text):
+        old_stop = len(old_widths) - 1 - (len(text) - stop)
+        delta = widths[-1] - old_widths[old_stop]
+        widths.extend(width + delta for width in old_widths[old_stop + 1:])
+    return widths
+
+
+def common_suffix_length(text_a, text_b, limit)-> int:
+    """Return the length of the common end of two strings, at most limit."""
+    low, high = 0, min(len(text_a), len(text_b), limit)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if text_a[len(text_a) - mid:] == text_b[len(text_b) - mid:]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def previous_word_boundary(text, pos)-> int:
+    """Finds the precedent word-space transition in a text.
+
+    Args:
+        text (str): The text.
+        pos (int): The position to search from.
+
+    Returns:
+        int: The index of the precedent word transition.
+    """
+
+    if pos == 0:
+        return 0
+
+    obj_pos = pos - 1
+    while not(text[obj_pos] in al and text[obj_pos - 1] not in al) and obj_pos > 0:
+        obj_pos -= 1
+
+    return obj_pos
+
+
+def next_word_boundary(text, pos)-> int:
+    """Finds the next word-space transition in a text.
+
+    Args:
+        text (str): The text.
+        pos (int): The position to search from.
+
+    Returns:
+        int: The index of the next word transition.
+    """
+
+    if pos >= len(text) - 1:
+        return len(text)
+
+    obj_pos = pos + 1
+    while not(text[obj_pos] not in al and text[obj_pos - 1] in al) and obj_pos < len(text) - 1:
+        obj_pos += 1
+
+    return obj_pos
+
+
+def closest_boundary(widths, x)-> int:
+    """Return the character boundary closest to a position.
+
+    Args:
+        widths (list[int]): The prefix widths of the text (see measure_prefix_widths).
+        x (float): The position, relative to the start of the text.
+
+    Returns:
+        int: The index of the boundary.
+    """
+
+    i = bisect_left(widths, x)
+    if i >= len(widths):
+        return len(widths) - 1
+    if i > 0 and x - widths[i - 1] < widths[i] - x:
+        return i - 1
+    return i
+
 
 class SingleLineText(Widget):
+    render_attributes = Widget.render_attributes | {"text_render", "text_color", "cursor_pos", "cursor_color", "cursor_visible",
+                                                    "selection_start", "selection_end", "selection_color", "scroll_x"}
+
     def __init__(self, pos, size, name, app, **kwargs):
         super().__init__(pos, size, name, app)
 
         # customisable attributes
         self.text = ""
-        self.font = pygame.font.Font()
+        self.font = get_font()  # shared fonts, see bazui.fonts
         self.text_color = (255, 255, 255)
         self.size_auto_fit = False
         self.editable = False
@@ -20,6 +162,9 @@ class SingleLineText(Widget):
         self.selection_color = "#264F78"
         self.redo_stack_max_size = 20
         self.undo_stack_max_size = 20
+        self.chunked_render = False  # render long texts by chunks, re-rendering only the edited ones
+        self.chunk_length = 256  # target number of characters of a chunk
+        self.render_cache = True  # access_surface only reads render_attributes, edits invalidate the widget
 
         self.background_color = (0, 0, 0, 0)
         self.on_drag = self.base_comportment_when_dragged
@@ -32,37 +177,159 @@ class SingleLineText(Widget):
 
         # forced attributes
         self.has_surface = True
-        self.surface = pygame.Surface(get(self.size), pygame.SRCALPHA)
+        self.surface = allocated(pygame.Surface(get(self.size), pygame.SRCALPHA))
         self._background_color = self.background_color
         self.can_be_dragged = self.selectable
         self.repeatable_event = None
         self.repeatable_first_activated = 0
         self.repeatable_last_activated = 0
         self.text_render = None
-        self.undo_stack = []
-        self.redo_stack = []
+        self.prefix_widths = [0]  # prefix_widths[i]: width of text[:i]
+        self.chunks = []  # chunked rendering: [text, prefix widths, render or None]
+        self._chunk_starts = []  # index in the text of the first character of each chunk
+        self._chunk_xs = []  # x of each chunk in the text render
+        self._chunks_color = self.text_color  # color the chunk renders were made with
+        self.scroll_x = 0  # width of text hidden on the left
+        self._scrolled_cursor = None  # cursor position the scroll was last adjusted to
+        self.history = UndoHistory(lambda pos, text: pos + len(text), self.undo_stack_max_size, self.redo_stack_max_size)
         self.selection_start = None
         self.selection_end = None
         self.time_at_update = 0
-
+        self.cursor_visible = False
 
         # initialize attributes
         self._text_setup()
 
     def _text_setup(self):
-        self.set_text(self.text)
+        self.set_text(self.text, clear_history=True)
         self.cursor_pos = len(self.text)
 
-    def set_text(self, text):
+    def set_text(self, text, clear_history=False):
+        """Replace the text, recording the replacement as one step of the undo history.
+
+        Args:
+            text (str): The new text.
+            clear_history (bool, optional): Clear the undo history instead. Defaults to False.
+        """
+
+        if clear_history:
+            self.history.clear()
+            self._replace_text(text)
+            return
+        start = common_prefix_length(self.text, text)
+        end = common_suffix_length(self.text, text, min(len(self.text), len(text)) - start)
+        state = (self.cursor_pos, self.selection_start, self.selection_end)
+        self.history.new_step()
+        if start < len(self.text) - end:
+            self.history.record("delete", start, self.text[start:len(self.text) - end], state, coalesce=False)
+        if start < len(text) - end:
+            self.history.record("insert", start, text[start:len(text) - end], state, coalesce=False)
+        self.history.new_step()
+        self._replace_text(text)
+        self.bound_cursor()
+
+    def _replace_text(self, text):
+        old_text = self.text
         self.text = text
+        if self.chunked_render:
+            self.update_chunks(old_text)
+        else:
+            start = common_prefix_length(old_text, self.text)
+            end = common_suffix_length(old_text, self.text, min(len(old_text), len(self.text)) - start)
+            self.prefix_widths = measure_prefix_widths(self.font, self.text, self.prefix_widths, start, end)
+            self.build_text_render()
         if self.size_auto_fit:
-            self.size = self.font.size(self.text)[0], self.size[1] # add space to render cursor on last char
-            self.surface = pygame.Surface(self.size, pygame.SRCALPHA)
-        self.build_text_render()
+            self.size = self.text_width, self.size[1] # add space to render cursor on last char
+            if self.surface.get_size() != tuple(self.size):
+                self.surface = allocated(pygame.Surface(self.size, pygame.SRCALPHA))
         self.time_at_update = time.time()
 
     def build_text_render(self):
-        self.text_render = self.font.render(self.text, True, self.text_color)
+        if self.editable:
+            # each edit would push a render of the whole line into the shared cache, evicting the labels
+            self.text_render = allocated(self.font.render(self.text, True, self.text_color))
+        else:
+            self.text_render = render_text(self.font, self.text, self.text_color)
+
+    def update_chunks(self, old_text):
+        """Update the chunks after the text changed from old_text: the chunks covering the edit are
+        split again and measured, the others keep their widths and render. Chunks are rendered
+        when they are first displayed.
+
+        Args:
+            old_text (str): The text the chunks were built for.
+        """
+
+        if not self.chunks:
+            old_text = ""
+        start = common_prefix_length(old_text, self.text)
+        old_end = len(old_text) - common_suffix_length(old_text, self.text, min(len(old_text), len(self.text)) - start)
+
+        # edited chunks, the one after included if the last piece would be short
+        first = max(0, bisect_right(self._chunk_starts, start) - 1)
+        last = max(first + 1, bisect_left(self._chunk_starts, old_end))
+        segment_start = self._chunk_starts[first] if self.chunks else 0
+        while True:
+            segment_end = self._chunk_starts[last] if last < len(self.chunks) else len(old_text)
+            segment = self.text[segment_start:segment_end + len(self.text) - len(old_text)]
+            remainder = len(segment) % self.chunk_length
+            if last >= len(self.chunks) or remainder == 0 or remainder >= self.chunk_length // 2:
+                break
+            last += 1
+
+        pieces = [segment[i:i + self.chunk_length] for i in range(0, len(segment), self.chunk_length)]
+        self.chunks[first:last] = [[piece, measure_prefix_widths(self.font, piece), None] for piece in pieces]
+
+        self._chunk_starts = list(accumulate((len(chunk[0]) for chunk in self.chunks[:-1]), initial=0))
+        self._chunk_xs = list(accumulate((chunk[1][-1] for chunk in self.chunks[:-1]), initial=0))
+        if not self.chunks:
+            self._chunk_starts, self._chunk_xs = [], []
+        self.invalidate()
+
+    @property
+    def text_width(self)-> int:
+        if self.chunked_render:
+            return self._chunk_xs[-1] + self.chunks[-1][1][-1] if self.chunks else 0
+        return self.prefix_widths[-1]
+
+    def prefix_width(self, index)-> int:
+        """Return the width of text[:index]."""
+        index = max(0, min(index, len(self.text)))
+        if not self.chunked_render:
+            return self.prefix_widths[index]
+        if not self.chunks:
+            return 0
+        chunk_idx = max(0, bisect_right(self._chunk_starts, index) - 1)
+        return self._chunk_xs[chunk_idx] + self.chunks[chunk_idx][1][index - self._chunk_starts[chunk_idx]]
+
+    def index_at(self, x)-> int:
+        """Return the character boundary closest to a position in the text render.
+
+        Args:
+            x (float): The position, relative to the start of the text.
+
+        Returns:
+            int: The cursor position.
+        """
+
+        if self.chunked_render:
+            if not self.chunks:
+                return 0
+            chunk_idx = max(0, bisect_right(self._chunk_xs, x) - 1)
+            offset, widths = self._chunk_starts[chunk_idx], self.chunks[chunk_idx][1]
+            x -= self._chunk_xs[chunk_idx]
+        else:
+            offset, widths = 0, self.prefix_widths
+        return offset + closest_boundary(widths, x)
+
+    def scroll_to_cursor(self):
+        """Scroll horizontally so that the cursor is visible."""
+        width = get(self.size)[0]
+        cursor_x = self.prefix_width(self.cursor_pos)
+        scroll_x = min(self.scroll_x, cursor_x)
+        scroll_x = max(scroll_x, cursor_x + 2 - width)  # room for the cursor
+        self.scroll_x = max(0, min(scroll_x, self.text_width + 2 - width))
+        self._scrolled_cursor = self.cursor_pos
 
     def handle_event(self, event, is_under_parent=True):
         return_code = super().handle_event(event, is_under_parent)
@@ -72,6 +339,10 @@ class SingleLineText(Widget):
             self.reset_selection()
             return 1
         
+        if event.type == pygame.MOUSEWHEEL and self.hovered:
+            max_scroll = max(0, self.text_width + 2 - get(self.size)[0])
+            self.scroll_x = max(0, min(self.scroll_x + (event.x or -event.y) * 20, max_scroll))
+
         if event.type == pygame.MOUSEBUTTONDOWN and self.selection_start is not None:
             if not self.rect.collidepoint(event.pos):
                 self.reset_selection()
@@ -85,6 +356,8 @@ class SingleLineText(Widget):
                     self.repeatable_last_activated = 0
 
             if event.type == pygame.KEYDOWN and self.selected:
+                if event.key == pygame.K_TAB: # TAB (left to focus traversal)
+                    return return_code
                 if (pygame.key.get_mods() & pygame.KMOD_SHIFT) and (pygame.key.get_mods() & pygame.KMOD_CTRL):
                     if event.key == pygame.K_LEFT: # CTRL + SHIFT + LEFT (select word to the left)
                         if self.selection_start is None:
@@ -134,15 +407,17 @@ class SingleLineText(Widget):
                     if event.key == pygame.K_RIGHT: # CTRL + RIGHT (move cursor to the right by word)
                         self.cursor_pos = self.ctrl_get_next()
                         self.set_repeatable(event)
-                    if event.key == pygame.K_BACKSPACE: # CTRL + BACKSPACE (delete word to the left)
-                        start = self.crtl_get_prec()
-                        end = self.cursor_pos
-                        self.delete_group(start, end)
+                    if event.key == pygame.K_BACKSPACE: # CTRL + BACKSPACE (delete selection or word to the left)
+                        if self.selection_start is not None:
+                            self.delete_selection()
+                        else:
+                            self.delete_group(self.crtl_get_prec(), self.cursor_pos)
                         self.set_repeatable(event)
-                    if event.key == pygame.K_DELETE: # CTRL + DELETE (delete word to the right)
-                        start = self.cursor_pos
-                        end = self.ctrl_get_next()
-                        self.delete_group(start, end)
+                    if event.key == pygame.K_DELETE: # CTRL + DELETE (delete selection or word to the right)
+                        if self.selection_start is not None:
+                            self.delete_selection()
+                        else:
+                            self.delete_group(self.cursor_pos, self.ctrl_get_next())
                         self.set_repeatable(event)
                 else:
                     if event.key == pygame.K_BACKSPACE: # BACKSPACE
@@ -177,55 +452,53 @@ class SingleLineText(Widget):
 
         return return_code
 
+    def insert_text(self, pos, text):
+        """Insert a text, recording the edit in the undo history."""
+        self.history.record("insert", pos, text, (self.cursor_pos, self.selection_start, self.selection_end))
+        self._replace_text(self.text[:pos] + text + self.text[pos:])
+
+    def delete_range(self, start, end, coalesce=True):
+        """Delete text[start:end], recording the edit in the undo history."""
+        if start >= end:
+            return
+        self.history.record("delete", start, self.text[start:end], (self.cursor_pos, self.selection_start, self.selection_end),
+                            coalesce)
+        self._replace_text(self.text[:start] + self.text[end:])
+
     def write(self, text_input):
         if self.selection_start is not None:
-            start = min(self.selection_start, self.selection_end)
-            end = max(self.selection_start, self.selection_end)
-            self.delete_group(start, end)
-            self.reset_selection()
-        text = self.text[:self.cursor_pos] + text_input + self.text[self.cursor_pos:]
+            self.delete_selection()
+        self.insert_text(self.cursor_pos, text_input)
         self.cursor_pos += len(text_input)
-        self.set_text(text)
+
+    def delete_selection(self):
+        start = min(self.selection_start, self.selection_end)
+        end = max(self.selection_start, self.selection_end)
+        self.delete_group(start, end)
 
     def delete(self):
         if self.selection_start is not None:
-            start = min(self.selection_start, self.selection_end)
-            end = max(self.selection_start, self.selection_end)
-            self.delete_group(start, end)
-            self.reset_selection()
+            self.delete_selection()
             return
         if self.cursor_pos == 0:
             return
-        text = self.text[:self.cursor_pos - 1] + self.text[self.cursor_pos:]
+        self.delete_range(self.cursor_pos - 1, self.cursor_pos)
         self.cursor_pos -= 1
-        self.set_text(text)
 
     def suppress(self):
         if self.selection_start is not None:
-            start = min(self.selection_start, self.selection_end)
-            end = max(self.selection_start, self.selection_end)
-            self.delete_group(start, end)
-            self.reset_selection()
+            self.delete_selection()
             return
         if self.cursor_pos == len(self.text):
             return
-        text = self.text[:self.cursor_pos] + self.text[self.cursor_pos + 1:]
-        self.set_text(text)
+        self.delete_range(self.cursor_pos, self.cursor_pos + 1)
 
     def mouse_to_cursor(self, pos):
-        relative_pos = (pos[0] - get(self.pos)[0], pos[1] - get(self.pos)[1])
-        for i in range(len(self.text) + 1):
-            diff = self.font.size(self.text[:i])[0] - relative_pos[0]
-            if diff >= 0:
-
-                diff_prev = self.font.size(self.text[:i - 1])[0] - relative_pos[0]
-                ret = i
-                if abs(diff_prev) < abs(diff):
-                    ret = i - 1
-                ret = max(0, min(ret, len(self.text)))
-                return ret
+        return self.index_at(pos[0] - get(self.pos)[0] + self.scroll_x)
 
-        return len(self.text)
+    def needs_pointer_events(self):
+        # a click outside the text has to reset the selection
+        return super().needs_pointer_events() or self.selection_start is not None
 
     def set_repeatable(self, event):
         if self.repeatable_event != event:
@@ -234,13 +507,26 @@ class SingleLineText(Widget):
             self.repeatable_last_activated = time.time()
 
             if event is not None:
-                self.save_state_to_stack()
+                self.history.new_step()
+
+    def next_frame_delay(self):
+        now = time.time()
+        delays = [super().next_frame_delay()]
+        if self.repeatable_event:
+            delays.append(max(0, max(self.repeatable_first_activated + 0.5, self.repeatable_last_activated + 0.04) - now))
+        if self.selected and self.editable:
+            delays.append(0.5 - (now - self.time_at_update) % 0.5)  # next cursor blink
+        return min((delay for delay in delays if delay is not None), default=None)
 
     def update(self):
         if self.repeatable_event:
             if time.time() - self.repeatable_last_activated > 0.04 and time.time() - self.repeatable_first_activated > 0.5:
                 self.repeatable_last_activated = time.time()
                 self.handle_event(self.repeatable_event, is_under_parent=False)
+        if self.editable and self.cursor_pos != self._scrolled_cursor:
+            self.scroll_to_cursor()
+        # cursor blinking
+        self.cursor_visible = self.selected and self.editable and (time.time() - self.time_at_update) % 1 < 0.5
         super().update()
 
     def access_surface(self):
@@ -250,44 +536,56 @@ class SingleLineText(Widget):
         if self.selection_start is not None:
             sel_min = min(self.selection_start, self.selection_end)
             sel_max = max(self.selection_start, self.selection_end)
-            sel_rect = pygame.Rect(self.font.size(self.text[:sel_min])[0], 0, self.font.size(self.text[sel_min:sel_max])[0], get(self.size)[1])
+            sel_x = self.prefix_width(sel_min)
+            sel_rect = pygame.Rect(sel_x - self.scroll_x, 0, self.prefix_width(sel_max) - sel_x, get(self.size)[1])
             pygame.draw.rect(self.surface, self.selection_color, sel_rect)
         # render cursor
-        if self.selected and self.editable:
-            # draw cursor
-            if (time.time() - self.time_at_update) % 1 < 0.5:
-                pygame.draw.rect(self.surface, self.cursor_color, (self.font.size(self.text[:self.cursor_pos])[0], 0, 2, get(self.size)[1]))
+        if self.cursor_visible:
+            pygame.draw.rect(self.surface, self.cursor_color, (self.prefix_width(self.cursor_pos) - self.scroll_x, 0, 2, get(self.size)[1]))
         # render text
-        self.surface.blit(self.text_render, (0, 0))
+        if self.chunked_render:
+            self.blit_visible_chunks()
+        else:
+            self.surface.blit(self.text_render, (-self.scroll_x, 0))
 
         return self.surface
 
-    def save_state_to_stack(self):
-        self.undo_stack.append((self.text, self.cursor_pos, self.selection_start, self.selection_end))
-
-        if len(self.undo_stack) > self.undo_stack_max_size:
-            self.undo_stack.pop(0)
+    def blit_visible_chunks(self):
+        """Blit the chunks in the visible part of the text, rendering them if needed."""
+        if self._chunks_color != self.text_color:
+            for chunk in self.chunks:
+                chunk[2] = None
+            self._chunks_color = self.text_color
+        end_x = self.scroll_x + get(self.size)[0]
+        blits = []
+        for chunk_idx in range(max(0, bisect_right(self._chunk_xs, self.scroll_x) - 1), len(self.chunks)):
+            if self._chunk_xs[chunk_idx] >= end_x:
+                break
+            chunk = self.chunks[chunk_idx]
+            if chunk[2] is None:
+                chunk[2] = allocated(self.font.render(chunk[0], True, self.text_color))
+            blits.append((chunk[2], (self._chunk_xs[chunk_idx] - self.scroll_x, 0)))
+        self.surface.blits(blits, doreturn=False)
+
+    def _apply_edit(self, operation, reverse):
+        """Perform an edit of the undo history, or its inverse, without recording it."""
+        kind, pos, text = operation
+        if (kind == "insert") != reverse:
+            self._replace_text(self.text[:pos] + text + self.text[pos:])
+            return pos + len(text)
+        self._replace_text(self.text[:pos] + self.text[pos + len(text):])
+        return pos
 
     def undo(self):
-        if self.undo_stack:
-            self.redo_stack.append((self.text, self.cursor_pos, self.selection_start, self.selection_end))
-            new_text, self.cursor_pos, self.selection_start, self.selection_end = self.undo_stack.pop()
-            self.set_text(new_text)
-
-            if len(self.redo_stack) > self.redo_stack_max_size:
-                self.redo_stack.pop(0)
-
+        state = self.history.undo(self._apply_edit, (self.cursor_pos, self.selection_start, self.selection_end))
+        if state is not None:
+            self.cursor_pos, self.selection_start, self.selection_end = state
             self.bound_cursor()
 
     def redo(self):
-        if self.redo_stack:
-            self.undo_stack.append((self.text, self.cursor_pos, self.selection_start, self.selection_end))
-            new_text, self.cursor_pos, self.selection_start, self.selection_end = self.redo_stack.pop()
-            self.set_text(new_text)
-
-            if len(self.undo_stack) > self.undo_stack_max_size:
-                self.undo_stack.pop(0)
-
+        state = self.history.redo(self._apply_edit)
+        if state is not None:
+            self.cursor_pos, self.selection_start, self.selection_end = state
             self.bound_cursor()
 
     def bound_cursor(self):
@@ -300,14 +598,7 @@ class SingleLineText(Widget):
             int: The index of the precedent word transition.
         """
 
-        if self.cursor_pos == 0:
-            return 0
-
-        obj_pos = self.cursor_pos - 1
-        while not(self.text[obj_pos] in al and self.text[obj_pos - 1] not in al) and obj_pos > 0:
-            obj_pos -= 1
-
-        return obj_pos
+        return previous_word_boundary(self.text, self.cursor_pos)
 
     def ctrl_get_next(self)-> int:
         """Finds the next word-space transition in the text.
@@ -316,14 +607,7 @@ class SingleLineText(Widget):
             int: The index of the next word transition.
         """
 
-        if self.cursor_pos >= len(self.text) - 1:
-            return len(self.text)
-
-        obj_pos = self.cursor_pos + 1
-        while not(self.text[obj_pos] not in al and self.text[obj_pos - 1] in al) and obj_pos < len(self.text) - 1:
-            obj_pos += 1
-
-        return obj_pos
+        return next_word_boundary(self.text, self.cursor_pos)
 
     def delete_group(self, start, end):
         """Deletes a group of characters from the text.
@@ -333,9 +617,9 @@ class SingleLineText(Widget):
             end (int): The end index of the group.
         """
 
-        text = self.text[:start] + self.text[end:]
+        self.delete_range(start, end, coalesce=False)
         self.cursor_pos = start
-        self.set_text(text)
+        self.reset_selection()
 
     def reset_selection(self):
         self.selection_start = None
@@ -1,48 +1,199 @@
+from bazui.ui.spatial_index import SpatialIndex
+from bazui.ui.registry import WidgetRegistry
+from bazui.ui.focus import FocusManager, KEYBOARD_EVENTS
+
+
 class UIContext:
     """Manages UI components and layout."""
     def __init__(self, app_state):
         self.app_state = app_state
-        self.widgets = {}  # Store UI elements like buttons, panels, etc.
-        self.crt_max_id = 0
+        self.registry = WidgetRegistry()  # id, name and identity indexes
+        self.widgets = self.registry.widgets  # Store UI elements like buttons, panels, etc.
         self.exit_events = False  # Flag to indicate if the update loop should exit
+        self.full_redraw = True  # Flag to force a full repaint on the next draw
+        self.max_dirty_rects = 16  # above this count, dirty areas are merged into their bounding rect
+        self._released_rects = []  # areas left by removed widgets
+        self._drawn_screen_size = None
+
+        # pointer event routing
+        self.spatial_index = SpatialIndex(app_state.spatial_index_cell_size) if app_state.spatial_index else None
+        self.pointer_route = None  # parent -> childs to dispatch the current positional event to (None for top level)
+        self._pointer_sticky = set()  # widgets that must receive the next positional event
+
+        # keyboard event routing
+        self.focus = FocusManager(self) if app_state.focus_routing else None
+
+    @property
+    def crt_max_id(self):
+        return self.registry.next_id
 
     def add_widget(self, widget):
         """Add a widget to the UI context."""
-        free_id = self.crt_max_id
-        self.widgets[free_id] = widget
-        self.crt_max_id += 1
+        free_id = self.registry.add(widget)
+        widget.set_ui_context(self)
         return free_id
 
+    def add_widgets(self, widgets):
+        """Add several widgets to the UI context.
+
+        Args:
+            widgets (Iterable[Widget]): The widgets to add.
+
+        Returns:
+            list[int]: The ids of the widgets.
+        """
+        return [self.add_widget(widget) for widget in widgets]
+
+    def widget_attached(self, widget):
+        """Called when a widget (top level or nested) joins the context."""
+        self.registry.attach(widget)
+        if self.spatial_index is not None:
+            self.spatial_index.insert(widget, widget.rect)
+        if self.focus is not None:
+            self.focus.tree_changed(widget, attached=True)
+
+    def widget_detached(self, widget):
+        """Called when a widget (top level or nested) leaves the context."""
+        self.registry.detach(widget)
+        if self.spatial_index is not None:
+            self.spatial_index.remove(widget)
+        self._pointer_sticky.discard(widget)
+        if self.focus is not None:
+            self.focus.tree_changed(widget, attached=False)
+
+    def widget_moved(self, widget):
+        """Called when the resolved rect of a widget changed."""
+        if self.spatial_index is not None:
+            self.spatial_index.insert(widget, widget.rect)
+
     def handle_events(self, event):
         self.exit_events = False  # Reset exit flag for each event
+        if self.spatial_index is not None and hasattr(event, "pos"):
+            self._handle_pointer_event(event)
+            return
+        if self.focus is not None and event.type in KEYBOARD_EVENTS:
+            self.focus.dispatch(event)
+            return
         for widget in self.widgets.values():
             widget.handle_event(event)
             if self.exit_events:
                 break
 
+    def _handle_pointer_event(self, event):
+        """Dispatch a positional event only to the widgets under the pointer, their ancestors,
+        and the widgets that need to reset a state. Consumption and propagation between
+        these widgets are the same as with a full dispatch."""
+
+        route = {}
+        for widget in self.spatial_index.query_point(event.pos) | self._pointer_sticky:
+            # register the widget and its ancestors up to the top level (None key)
+            while widget is not None:
+                siblings = route.setdefault(widget.parent, set())
+                if widget in siblings:
+                    break
+                siblings.add(widget)
+                widget = widget.parent
+
+        top_level = route.get(None, ())
+        self.pointer_route = route
+        try:
+            for widget in sorted(top_level, key=self.registry.order):
+                widget.handle_event(event)
+                if self.exit_events:
+                    break
+        finally:
+            self.pointer_route = None
+
+        self._pointer_sticky = {widget for siblings in route.values() for widget in siblings
+                                if widget.needs_pointer_events()}
+
     def update(self):
         for widget in self.widgets.values():
             widget.update()
 
+    def next_frame_delay(self):
+        """Return the shortest delay (s) before a widget needs a new frame, None if no widget needs one."""
+        delays = [delay for delay in (widget.next_frame_delay() for widget in self.widgets.values()) if delay is not None]
+        if self.full_redraw:
+            delays.append(0)
+        return min(delays, default=None)
+
     def draw(self, screen):
+        self.full_redraw = False  # the whole screen is repainted
         for widget in self.widgets.values():
             widget.draw(screen)
 
+    def draw_dirty(self, screen, background_color):
+        """Repaint only the areas of the screen covered by invalidated widgets.
+
+        Args:
+            screen (pygame.Surface): The screen to draw on.
+            background_color: The color used to clear the repainted areas.
+
+        Returns:
+            list[pygame.Rect] | None: The repainted areas, or None if the whole screen was repainted.
+        """
+
+        if self.full_redraw or screen.get_size() != self._drawn_screen_size:
+            self.full_redraw = False
+            self._drawn_screen_size = screen.get_size()
+            self._released_rects = []
+            screen.fill(background_color)
+            self.draw(screen)
+            return None
+
+        rects = self._released_rects
+        self._released_rects = []
+        dirty_widgets = []
+        for widget in self.widgets.values():
+            widget.collect_dirty_rects(rects, dirty_widgets)
+        rects = merge_rects(rects, screen.get_rect(), self.max_dirty_rects)
+
+        for rect in rects:
+            screen.set_clip(rect)
+            screen.fill(background_color)
+            for widget in self.widgets.values():
+                # childs of a surface widget are clipped to it, the whole subtree can be skipped
+                if widget.has_surface and not widget.rect.colliderect(rect):
+                    continue
+                widget.draw(screen)
+        screen.set_clip(None)
+
+        for widget in dirty_widgets:
+            widget.mark_drawn()
+        return rects
+
+    def render_cache_stats(self):
+        """Sum the render cache counters of every widget of the context.
+
+        Returns:
+            dict: The number of cache "hits" and "misses".
+        """
+
+        stats = {"hits": 0, "misses": 0}
+        stack = list(self.widgets.values())
+        while stack:
+            widget = stack.pop()
+            stats["hits"] += widget.render_cache_hits
+            stats["misses"] += widget.render_cache_misses
+            stack.extend(child for child in widget.childs if child)
+        return stats
+
     def getbyid(self, widget_id):
         return self.widgets.get(widget_id)
     def getbywidget(self, widget):
-        for widget_id, stored_widget in self.widgets.items():
-            if widget == stored_widget:
-                return widget_id
+        """Return the id of a widget, or of the top level widget containing it."""
+        return self.registry.getid(widget)
     def __getitem__(self, widget_name):
-        for widget in self.widgets.values():
-            if widget.name == widget_name:
-                return widget
-        return None
+        """Return a widget by name, top level widgets first, then nested childs."""
+        return self.registry.getbyname(widget_name)
 
     def remove_widget(self, widget_id):
         try:
-            del self.widgets[widget_id]
+            widget = self.registry.remove(widget_id)
+            if widget._drawn_rect is not None:
+                self._released_rects.append(widget._drawn_rect)
+            widget.set_ui_context(None)
         except KeyError:
             # the widget was not found
             pass
@@ -54,3 +205,32 @@ class UIContext:
         for widget_id, widget in self.widgets.items():
             txt.append(f"{widget_id}: {widget}")
         return "\n".join(txt)
+
+
+def merge_rects(rects, bounds, max_count):
+    """Merge overlapping rects and clip them to bounds.
+
+    Args:
+        rects (list[pygame.Rect]): The rects to merge.
+        bounds (pygame.Rect): The area the result is clipped to.
+        max_count (int): Above this count, the rects are merged into their bounding rect.
+
+    Returns:
+        list[pygame.Rect]: Disjoint rects covering the input rects.
+    """
+
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if rect.width == 0 or rect.height == 0:
+            continue
+        # absorb every merged rect overlapping the new one, until stable
+        idx = rect.collidelist(merged)
+        while idx != -1:
+            rect.union_ip(merged.pop(idx))
+            idx = rect.collidelist(merged)
+        merged.append(rect)
+
+    if len(merged) > max_count:
+        return [merged[0].unionall(merged[1:])]
+    return merged
@@ -0,0 +1,128 @@
+import time
+from collections import deque
+
+
+class UndoHistory:
+    """Undo and redo history of a text, storing edit operations instead of copies of the text.
+
+    An operation is ("insert", pos, text) or ("delete", pos, text): only the edited text is kept,
+    so deep histories stay cheap. Positions are opaque to the history (e.g. indexes, or
+    (line, column) tuples), the widget gives end_of to compute the position after a text.
+    The operations recorded between two calls to new_step form one undo step. Steps of
+    consecutive typing, or of consecutive deletions, are merged into one step.
+    """
+    def __init__(self, end_of, max_size=20, redo_max_size=20, coalesce_delay=1.0):
+        """
+        Args:
+            end_of (callable): end_of(pos, text) returns the position after text inserted at pos.
+            max_size (int, optional): Number of undo steps kept. Defaults to 20.
+            redo_max_size (int, optional): Number of redo steps kept. Defaults to 20.
+            coalesce_delay (float, optional): Time (s) after which typing starts a new step. Defaults to 1.0.
+        """
+        self.end_of = end_of
+        self.undo_stack = deque(maxlen=max_size)  # [state before the step, operations, state after it or None]
+        self.redo_stack = deque(maxlen=redo_max_size)
+        self.coalesce_delay = coalesce_delay
+        self._step = None  # step the next operations are added to
+        self._last_record = 0
+
+    def new_step(self):
+        """Start a new step with the next recorded operation, unless it continues the typing of the last step."""
+        self._step = None
+
+    def record(self, kind, pos, text, state=None, coalesce=True):
+        """Record an edit operation.
+
+        Args:
+            kind (str): "insert" or "delete".
+            pos: The position of the inserted text, or of the start of the deleted text.
+            text (str): The inserted or deleted text.
+            state (optional): Restored when the step is undone (e.g. the cursor position before the edit).
+                Only used when the operation starts a new step. Defaults to None.
+            coalesce (bool, optional): Allow merging the operation into the last step. Defaults to True.
+        """
+
+        now = time.time()
+        self.redo_stack.clear()
+        if self._step is None and not (coalesce and self._coalesce(kind, pos, text, now)):
+            self._step = [state, [], None]
+            self.undo_stack.append(self._step)
+        if self._step is not None:
+            self._step[1].append((kind, pos, text))
+        self._last_record = now
+
+    def _coalesce(self, kind, pos, text, now)-> bool:
+        """Merge a single character operation into the last step, if it continues it."""
+        if (not self.undo_stack or now - self._last_record > self.coalesce_delay
+                or len(text) != 1 or text == "\n" or len(self.undo_stack[-1][1]) != 1):
+            return False
+        ops = self.undo_stack[-1][1]
+        last_kind, last_pos, last_text = ops[0]
+        if kind != last_kind:
+            return False
+        if kind == "insert":
+            # typing, a new step per word
+            if pos != self.end_of(last_pos, last_text) or (last_text[-1].isspace() and not text.isspace()):
+                return False
+            ops[0] = (kind, last_pos, last_text + text)
+        elif self.end_of(pos, text) == last_pos:  # backspace
+            ops[0] = (kind, pos, text + last_text)
+        elif pos == last_pos:  # delete
+            ops[0] = (kind, pos, last_text + text)
+        else:
+            return False
+        return True
+
+    def undo(self, apply, state=None):
+        """Undo the last step.
+
+        Args:
+            apply (callable): apply(operation, reverse) performs an operation, or its inverse.
+            state (optional): The current state (e.g. cursor and selection), restored when the step
+                is redone. Defaults to None.
+
+        Returns:
+            The state recorded with the step, None if there is nothing to undo.
+        """
+
+        if not self.undo_stack:
+            return None
+        step = self.undo_stack.pop()
+        step[2] = state
+        for operation in reversed(step[1]):
+            apply(operation, True)
+        self.redo_stack.append(step)
+        self._step = None
+        self._last_record = 0
+        return step[0]
+
+    def redo(self, apply):
+        """Redo the last undone step.
+
+        Args:
+            apply (callable): See undo.
+
+        Returns:
+            The state given when the step was undone, or if none was given the value returned by
+            apply for the last operation (e.g. the cursor position after it). None if there is
+            nothing to redo.
+        """
+
+        if not self.redo_stack:
+            return None
+        step = self.redo_stack.pop()
+        result = None
+        for operation in step[1]:
+            result = apply(operation, False)
+        self.undo_stack.append(step)
+        self._step = None
+        self._last_record = 0
+        return step[2] if step[2] is not None else result
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._step = None
+
+    def __len__(self):
+        return len(self.undo_stack)
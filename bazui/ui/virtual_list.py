@@ -0,0 +1,154 @@
+import math
+import pygame
+from bazui.ui.widget import Widget
+from bazui.ui.link import get
+from bazui.surfaces import allocated
+
+
+class VirtualList(Widget):
+    """Scrolling list of item_count items, of which only the visible ones (plus overscan) have a widget.
+    Row widgets are created by row_factory and recycled as the list scrolls: row_binder fills a row
+    with the data of an item. Visible items are found arithmetically from the scroll offset, so
+    scrolling and drawing cost the same whatever the number of items."""
+    render_attributes = Widget.render_attributes | {"scroll_y"}
+
+    def __init__(self, pos, size, name, app, item_count, row_factory, row_binder, **kwargs):
+        """
+        Args:
+            item_count (int): The number of items.
+            row_factory (callable): row_factory(virtual_list) returns a new row widget.
+            row_binder (callable): row_binder(row, index) displays the item index in a row.
+        """
+        super().__init__(pos, size, name, app)
+        self.item_count = item_count
+        self.row_factory = row_factory
+        self.row_binder = row_binder
+
+        # customisable attributes
+        self.row_height = 24
+        self.overscan = 2  # rows kept bound above and below the visible ones
+        self.scroll_step = 3  # rows scrolled per mouse wheel step
+
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+            else:
+                raise AttributeError(f"{type(self).__name__} has no attribute {key}")
+
+        # forced attributes
+        self.has_surface = True  # rows are clipped to the list area
+        self.surface = allocated(pygame.Surface(get(self.size), pygame.SRCALPHA))
+        self.scroll_y = 0
+        self.bound_rows = {}  # item index -> row widget
+        self._spare_rows = []  # rows out of the widget tree, kept for reuse
+        self._layout_key = None  # state the rows were last laid out for
+
+    def columns(self)-> int:
+        return 1
+
+    def item_size(self):
+        return get(self.size)[0], self.row_height
+
+    def content_height(self)-> int:
+        return math.ceil(self.item_count / self.columns()) * self.row_height
+
+    def visible_items(self)-> range:
+        """Return the items to bind: the visible ones and the overscan."""
+        columns = self.columns()
+        first_line = int(self.scroll_y // self.row_height) - self.overscan
+        last_line = math.ceil((self.scroll_y + get(self.size)[1]) / self.row_height) + self.overscan
+        return range(max(0, first_line * columns), min(self.item_count, last_line * columns))
+
+    def item_pos(self, index):
+        """Return the position of an item on screen."""
+        pos = get(self.pos)
+        item_size = self.item_size()
+        line, column = divmod(index, self.columns())
+        return pos[0] + column * item_size[0], pos[1] + line * self.row_height - self.scroll_y
+
+    def item_at(self, pos):
+        """Return the item under a point, None if there is none."""
+        origin = get(self.pos)
+        x, y = pos[0] - origin[0], pos[1] - origin[1] + self.scroll_y
+        column = int(x // self.item_size()[0])
+        if x < 0 or y < 0 or column >= self.columns():
+            return None
+        index = int(y // self.row_height) * self.columns() + column
+        return index if index < self.item_count else None
+
+    def scroll_to(self, scroll_y):
+        self.scroll_y = max(0, min(scroll_y, self.content_height() - get(self.size)[1]))
+
+    def scroll_to_item(self, index):
+        """Scroll so that an item is visible."""
+        top = index // self.columns() * self.row_height
+        if top < self.scroll_y:
+            self.scroll_to(top)
+        elif top + self.row_height > self.scroll_y + get(self.size)[1]:
+            self.scroll_to(top + self.row_height - get(self.size)[1])
+
+    def set_item_count(self, item_count):
+        self.item_count = item_count
+        self.scroll_to(self.scroll_y)
+        self.refresh()
+
+    def refresh(self, index=None):
+        """Bind the rows again, after the data of an item (or of every item) changed."""
+        if index is None:
+            for bound_index, row in self.bound_rows.items():
+                if bound_index < self.item_count:
+                    self.row_binder(row, bound_index)
+            self._layout_key = None
+        elif index in self.bound_rows:
+            self.row_binder(self.bound_rows[index], index)
+
+    def layout_rows(self):
+        """Bind the visible items to row widgets, recycling the rows of the items that left the view."""
+        visible = self.visible_items()
+        free_rows = [row for index, row in self.bound_rows.items() if index not in visible]
+        bound_rows = {index: row for index, row in self.bound_rows.items() if index in visible}
+        item_size = self.item_size()
+        for index in visible:
+            row = bound_rows.get(index)
+            if row is None:
+                if free_rows:
+                    row = free_rows.pop()
+                else:
+                    row = self.set_child(self._spare_rows.pop() if self._spare_rows else self.row_factory(self))
+                bound_rows[index] = row
+                self.row_binder(row, index)
+            row.pos = self.item_pos(index)
+            row.size = item_size
+        # the view shrank: keep the rows left aside
+        for row in free_rows:
+            self.remove_child(row)
+            self._spare_rows.append(row)
+        self.bound_rows = bound_rows
+
+    def handle_event(self, event, is_under_parent=True):
+        consumed = super().handle_event(event, is_under_parent)
+        # rows consume the motion events, the pointer position tells if the list is hovered
+        if event.type == pygame.MOUSEWHEEL and self.rect.collidepoint(self.app.app_state.mouse_pos):
+            self.scroll_to(self.scroll_y - event.y * self.scroll_step * self.row_height)
+            return True
+        return consumed
+
+    def update(self):
+        layout_key = (self.scroll_y, tuple(get(self.pos)), tuple(get(self.size)), self.item_count)
+        if layout_key != self._layout_key:
+            self.layout_rows()
+            self._layout_key = layout_key
+        super().update()
+
+
+class VirtualGrid(VirtualList):
+    """VirtualList laying out its items in as many columns of cell_width as fit in its width."""
+    def __init__(self, pos, size, name, app, item_count, row_factory, row_binder, **kwargs):
+        self.cell_width = 64
+        super().__init__(pos, size, name, app, item_count, row_factory, row_binder, **kwargs)
+
+    def columns(self)-> int:
+        return max(1, int(get(self.size)[0] // self.cell_width))
+
+    def item_size(self):
+        return self.cell_width, self.row_height
@@ -1,8 +1,25 @@
 import pygame
-from bazui.ui.link import get
+from bazui.ui.link import get, Observable
+from bazui.surfaces import allocated
+
+class Widget(Observable):
+    # attributes whose change modifies the widget appearance (see invalidate)
+    render_attributes = frozenset({"background_color", "contour_color", "contour_width", "corner_radius",
+                                   "hovered", "selected", "render_method"})
 
-class Widget:
     def __init__(self, pos, size, name, app, **kwargs):
+        # render state
+        self.dirty = True  # True when the widget area has to be repainted
+        self.parent = None
+        self.ui_context = None  # set when the widget is added to a UIContext
+        self._child_names = {}  # name -> childs, for __getitem__
+        self._drawn_rect = None  # rect of the widget when it was last drawn
+        self._released_rects = []  # areas left by removed childs
+        self._child_positions = {}  # child -> index in childs, rebuilt when found stale (see child_position)
+        self._render_cache_valid = False  # True while self.surface holds the up to date composed render
+        self.render_cache_hits = 0
+        self.render_cache_misses = 0
+
         self.pos = pos
         self.size = size
         self.name = name
@@ -17,6 +34,8 @@ class Widget:
         self.on_hover = None
         self.on_drag_reception = None
         self.on_drag = None
+        self.on_key_capture = None  # with focus routing, called with keyboard events going to a descendant
+        self.on_key = None  # with focus routing, called with keyboard events not consumed by a descendant
         self.childs = []
         self.background_color = None
         self.has_surface = False
@@ -26,6 +45,10 @@ class Widget:
         self.contour_width = 0
         self.corner_radius = 0
         self.render_method = None
+        # reuse the composed surface until the widget is invalidated. None: only for widgets drawn by
+        # Widget alone, a render_method or an overridden access_surface or draw could read attributes
+        # outside render_attributes without it being detected
+        self.render_cache = None
 
         for key, value in kwargs.items():
             if hasattr(self, key):
@@ -35,20 +58,89 @@ class Widget:
 
         self._widget_setup()
 
+    def __setattr__(self, key, value):
+        # every assignment goes through here: plain attributes are stored after a few lookups,
+        # and the bookkeeping of the render state writes to __dict__ directly
+        if key in self.render_attributes:
+            if "dirty" in self.__dict__ and self.__dict__.get(key) != value:
+                Observable.__setattr__(self, key, value)
+                self.invalidate()
+                if key == "selected" and self.ui_context is not None and self.ui_context.focus is not None:
+                    self.ui_context.focus.widget_selected(self, value)
+                return
+        elif key == "name" and "name" in self.__dict__ and self.name != value:
+            self._rename(self.name, value)
+        observers = self.__dict__.get("_link_observers")
+        if observers is not None and key in observers:
+            Observable.__setattr__(self, key, value)
+        else:
+            object.__setattr__(self, key, value)
+        if (key == "pos" or key == "size") and self.__dict__.get("ui_context") is not None:
+            # index the new rect now, for the next events of the frame (moves through links are
+            # detected by update)
+            self.ui_context.widget_moved(self)
+
     @property
     def rect(self):
         return pygame.Rect(get(self.pos), get(self.size))
 
+    def invalidate(self):
+        """Mark the widget as needing to be repainted and its surface as needing to be rebuilt.
+        Changes to the attributes listed in render_attributes and to the widget size
+        invalidate the widget automatically. Widgets whose appearance depends on other data
+        (e.g. an animated render_method) have to call it themselves, or leave render_cache disabled.
+        """
+
+        self.__dict__["dirty"] = True
+        self.__dict__["_render_cache_valid"] = False
+        self._invalidate_parent_surfaces()
+
+    def _invalidate_parent_surfaces(self):
+        """Drop the cached render of the ancestors the widget is composed into."""
+
+        parent = self.parent
+        while parent is not None:
+            if parent.has_surface:
+                parent.__dict__["_render_cache_valid"] = False
+            parent = parent.parent
+
+    def collect_dirty_rects(self, rects: list[pygame.Rect], widgets: list["Widget"]):
+        """Gather the areas of the widget and its childs that have to be repainted.
+
+        Args:
+            rects (list[pygame.Rect]): The list to which dirty areas are appended.
+            widgets (list[Widget]): The list to which dirty widgets are appended.
+        """
+
+        if self._released_rects:
+            rects.extend(self._released_rects)
+            self.__dict__["_released_rects"] = []
+        if self.dirty:
+            if self._drawn_rect is not None:
+                rects.append(self._drawn_rect)
+            rects.append(self.rect)
+            widgets.append(self)
+        for child in self.childs:
+            if child:
+                child.collect_dirty_rects(rects, widgets)
+
+    def mark_drawn(self):
+        """Record the widget as up to date on screen."""
+
+        self.__dict__["dirty"] = False
+        self.__dict__["_drawn_rect"] = self.rect
+
     def handle_event(self, event, is_under_parent=True):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             self.selected = False
 
         if hasattr(event, "pos"):
-            # Perform event handling on childs (all childs are checked)
+            # Perform event handling on childs (all childs that may react are checked)
             consumed = 0
-            for child in self.childs:
+            childs_under_parent = self.rect.collidepoint(event.pos) and is_under_parent
+            for child in self.pointer_event_targets(event):
                 if child:
-                    consumed += child.handle_event(event, self.rect.collidepoint(event.pos) and is_under_parent)
+                    consumed += child.handle_event(event, childs_under_parent)
             if consumed > 0:
                 return True
         else:
@@ -92,6 +184,93 @@ class Widget:
                 self.app.app_state.clicked_widget_pos = (0, 0)
         return False
 
+    def pointer_event_targets(self, event)-> list["Widget"]:
+        """Return the childs a positional event has to be dispatched to.
+        When the UIContext routes the event through its spatial index, only the childs
+        under the pointer, or needing to reset a state, are returned.
+
+        Args:
+            event (pygame.event.Event): The positional event.
+
+        Returns:
+            list[Widget]: The childs to dispatch the event to, in drawing order.
+        """
+
+        route = self.ui_context.pointer_route if self.ui_context is not None else None
+        if route is None:
+            return self.childs
+        routed = route.get(self)
+        if not routed:
+            return ()
+        return sorted(routed, key=self.child_position)
+
+    def child_position(self, child)-> int:
+        """Return the index of a child in childs, in constant time while childs is not modified.
+
+        Args:
+            child (Widget): The child.
+
+        Returns:
+            int: Its index in childs (drawing order).
+        """
+
+        position = self._child_positions.get(child)
+        if position is None or position >= len(self.childs) or self.childs[position] is not child:
+            # childs was modified: index all of them again
+            self._child_positions = {widget: i for i, widget in enumerate(self.childs) if widget}
+            position = self._child_positions[child]
+        return position
+
+    def needs_pointer_events(self)-> bool:
+        """Whether the widget has to receive positional events even when it is not under the pointer,
+        to reset its hovered, selected or dragged states.
+
+        Returns:
+            bool: True if the widget must receive every positional event.
+        """
+
+        app_state = self.app.app_state
+        return self.hovered or self.selected or app_state.dragged_widget is self or app_state.clicked_widget is self
+
+    def next_frame_delay(self):
+        """Return the time before the widget or one of its childs needs a new frame (pending repaint,
+        animation, key repeat...). Used by the frame scheduler to sleep while nothing happens.
+        Widgets animated by other means than invalidate (e.g. an uncached render_method) must override it.
+
+        Returns:
+            float | None: The delay (s), 0 for the next frame, None if no frame is needed.
+        """
+
+        app_state = self.app.app_state
+        if (self.dirty or (self.hovered and self.on_hover)
+                or (app_state.dragged_widget is self and self.can_be_dragged and self.on_drag)):
+            return 0
+        delay = None
+        for child in self.childs:
+            if child:
+                child_delay = child.next_frame_delay()
+                if child_delay is not None and (delay is None or child_delay < delay):
+                    delay = child_delay
+                    if delay <= 0:
+                        break
+        return delay
+
+    def set_ui_context(self, ui_context):
+        """Attach the widget and its childs to a UIContext (or detach them with None).
+
+        Args:
+            ui_context (UIContext | None): The context the widget belongs to.
+        """
+
+        if self.ui_context is not None and self.ui_context is not ui_context:
+            self.ui_context.widget_detached(self)
+        self.ui_context = ui_context
+        if ui_context is not None:
+            ui_context.widget_attached(self)
+        for child in self.childs:
+            if child:
+                child.set_ui_context(ui_context)
+
     def draw(self, screen: pygame.Surface, origin: tuple[int, int]=(0, 0)):
         """Draw the widget and its childs on the screen.
 
@@ -100,11 +279,24 @@ class Widget:
             origin (tuple[int, int], optional): The origin of the surface. Defaults to (0, 0).
         """
 
+        self.mark_drawn()
+
         if self.has_surface: # childs draw position is relative to widget position
-            rendered_surface = self.access_surface()
-            for child in self.childs:
-                if child:
-                    child.draw(rendered_surface, origin=get(self.pos))
+            render_cache = self.render_cache
+            if render_cache is None:
+                cls = type(self)
+                render_cache = (self.render_method is None and cls.access_surface is Widget.access_surface
+                                and cls.draw is Widget.draw)
+            if render_cache and self._render_cache_valid:
+                self.__dict__["render_cache_hits"] += 1
+                rendered_surface = self.surface
+            else:
+                self.__dict__["render_cache_misses"] += 1
+                rendered_surface = self.access_surface()
+                for child in self.childs:
+                    if child:
+                        child.draw(rendered_surface, origin=get(self.pos))
+                self.__dict__["_render_cache_valid"] = True
             blit_pos = (get(self.pos)[0] - origin[0], get(self.pos)[1] - origin[1])
             screen.blit(rendered_surface, blit_pos)
         else: # childs draw position is absolute
@@ -125,13 +317,31 @@ class Widget:
             raise AttributeError("on_hover must be callable")
 
         if self.has_surface:
-            self.surface = pygame.Surface(get(self.size), pygame.SRCALPHA)
+            self.surface = allocated(pygame.Surface(get(self.size), pygame.SRCALPHA))
+
+    def _rename(self, old_name, new_name):
+        """Update the name indexes of the parent and the UIContext."""
+
+        if self.parent is not None:
+            self.parent._unindex_child(self, old_name)
+            self.parent._child_names.setdefault(new_name, []).append(self)
+        if self.ui_context is not None:
+            self.ui_context.registry.rename(self, old_name, new_name)
+
+    def _index_child(self, widget):
+        self._child_names.setdefault(widget.name, []).append(widget)
+
+    def _unindex_child(self, widget, name=None):
+        name = widget.name if name is None else name
+        widgets = self._child_names.get(name)
+        if widgets is not None and widget in widgets:
+            widgets.remove(widget)
+            if not widgets:
+                del self._child_names[name]
 
     def __getitem__(self, widget_name):
-        for widget in self.childs:
-            if widget.name == widget_name:
-                return widget
-        return None
+        widgets = self._child_names.get(widget_name)
+        return widgets[0] if widgets else None
 
     def set_child(self, widget: "Widget")-> "Widget":
         """Add a child widget to the widget.
@@ -144,6 +354,11 @@ class Widget:
         """
 
         self.childs.append(widget)
+        widget.parent = self
+        self._index_child(widget)
+        widget.invalidate()
+        if self.ui_context is not None:
+            widget.set_ui_context(self.ui_context)
         return widget
 
     def remove_child(self, widget: "Widget"):
@@ -154,6 +369,12 @@ class Widget:
         """
 
         self.childs.remove(widget)
+        self._unindex_child(widget)
+        widget._invalidate_parent_surfaces()
+        widget.parent = None
+        if widget._drawn_rect is not None:
+            self._released_rects.append(widget._drawn_rect)
+        widget.set_ui_context(None)
 
     def update(self):
         """Update the widget and its childs.
@@ -164,10 +385,18 @@ class Widget:
         if self.hovered and self.on_hover:
             self.on_hover()
 
+        if self.rect != self._drawn_rect:
+            # moving does not change the widget own render, only where it is composed
+            self.dirty = True
+            self._invalidate_parent_surfaces()
+            if self.ui_context is not None:
+                self.ui_context.widget_moved(self)
+
         if self.has_surface and self.surface.size != get(self.size):
-            new_surface = pygame.Surface(get(self.size), pygame.SRCALPHA)
+            new_surface = allocated(pygame.Surface(get(self.size), pygame.SRCALPHA))
             new_surface.blit(self.surface, (0, 0))
             self.surface = new_surface
+            self.invalidate()
 
         for child in self.childs:
             if child:
@@ -175,7 +404,7 @@ class Widget:
 
     def access_surface(self)-> pygame.Surface:
         """Return the surface of the widget.
-        This is called once per frame right before the widget is drawn.
+        This is called right before the widget is drawn, unless its cached render is still valid.
 
         Returns:
             pygame.Surface: The surface of the widget.
@@ -0,0 +1,10 @@
+"""Headless benchmarks of bazui.
+
+Run them from the repository root with:
+
+    python -m benchmarks [--baseline benchmarks/baseline.json] [--output results.json]
+
+Every metric is a time in seconds (lower is better). With a baseline, the metrics slower than
+the baseline by more than the tolerance are listed and the exit code is 1. Baselines are only
+meaningful on the machine they were recorded on: record one with --save-baseline.
+"""
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+
+# headless: must be set before pygame creates the display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from benchmarks import runner
+from benchmarks import bench_widgets, bench_grid, bench_text, bench_images, bench_flex  # register the benchmarks
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None)-> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the bazui benchmarks.")
+    parser.add_argument("names", nargs="*", help="only run the benchmarks starting with these names")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline to compare the results to")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to the baseline instead")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="relative slowdown above which a metric regressed (default 0.5)")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, function in runner.BENCHMARKS:
+            print(f"{name:<10} {function.__doc__}")
+        return 0
+
+    pygame.init()
+    data = runner.run(args.names)
+    if args.output:
+        runner.save(data, args.output)
+    if args.save_baseline:
+        if os.path.exists(args.baseline) and args.names:
+            # partial run: keep the metrics of the other benchmarks
+            baseline = runner.load(args.baseline)
+            baseline["results"].update(data["results"])
+            data = dict(data, results=baseline["results"])
+        runner.save(data, args.baseline)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, nothing to compare to")
+        return 0
+
+    comparison = runner.compare(data["results"], runner.load(args.baseline)["results"], args.tolerance)
+    regressions = [entry for entry in comparison if entry["regressed"]]
+    print(f"\ncompared {len(comparison)} metrics to {args.baseline}")
+    for entry in sorted(comparison, key=lambda entry: entry["ratio"], reverse=True):
+        marker = "REGRESSION" if entry["regressed"] else ""
+        print(f"{entry['metric']:<50} {runner.format_time(entry['baseline']):>12} -> "
+              f"{runner.format_time(entry['result']):>12}  x{entry['ratio']:.2f} {marker}")
+    if regressions:
+        print(f"\n{len(regressions)} metrics regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
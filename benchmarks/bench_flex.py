@@ -0,0 +1,51 @@
+import itertools
+from bazui.ui.widget import Widget
+from bazui.ui.flex import FlexBox, GROW, VERTICAL
+from benchmarks.runner import benchmark, measure
+from benchmarks.helpers import make_app, close_app
+
+TREE_SHAPES = ((10, 100), (50, 100))  # rows of cells
+
+
+def make_tree(app, rows, columns)-> FlexBox:
+    root = FlexBox((0, 0), (1600, 1200), "root", app, direction=VERTICAL, child_gap=1)
+    for i in range(rows):
+        row = root.set_child(FlexBox((0, 0), (0, 0), f"row{i}", app, sizing=(GROW(), GROW()), child_gap=1))
+        for j in range(columns):
+            row.set_child(Widget((0, 0), (10, 10), f"cell{j}", app), sizing=(GROW(), GROW()))
+    return root
+
+
+@benchmark("flex")
+def bench_flex():
+    """FlexBox layout of large trees: full relayout, incremental relayout and unchanged frames."""
+    results = {}
+    for rows, columns in TREE_SHAPES:
+        count = rows * (columns + 1) + 1
+        app, state = make_app()
+        root = make_tree(app, rows, columns)
+        root.layout()
+        widths = itertools.cycle(range(1500, 1700))
+
+        def resize():
+            root.size = (next(widths), 1200)
+            root.layout()
+        results[f"resize[{count}]"] = measure(resize, repeat=5)
+
+        positions = itertools.cycle(range(100))
+
+        def move():
+            root.pos = (next(positions), 0)
+            root.layout()
+        results[f"move[{count}]"] = measure(move, repeat=5)
+
+        leaf = root.childs[rows // 2].childs[columns // 2].layout_node
+        leaf_widths = itertools.cycle(range(5, 50))
+
+        def leaf_change():
+            leaf.content_size = (next(leaf_widths), 10)
+            root.layout()
+        results[f"leaf_change[{count}]"] = measure(leaf_change, repeat=5, number=20)
+        results[f"unchanged[{count}]"] = measure(root.layout, repeat=5, number=1000)
+        close_app(app)
+    return results
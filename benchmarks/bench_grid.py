@@ -0,0 +1,45 @@
+from bazui.ui.grid import Grid
+from bazui.ui.widget import Widget
+from bazui.ui.link import LinkAttribute
+from benchmarks.runner import benchmark, measure
+from benchmarks.helpers import make_app, close_app, measure_sweep
+
+GRID_SHAPES = ((30, 30), (100, 100))
+SPARSE_SHAPE = (1000, 1000)
+SPARSE_STEP = 20  # one occupied cell every SPARSE_STEP rows and columns
+
+
+def fill_grid(app, grid, step=1):
+    cell_size = LinkAttribute(grid, "cell_size")
+    for i in range(0, grid.grid_shape[0], step):
+        for j in range(0, grid.grid_shape[1], step):
+            grid.set_child((i, j), Widget((0, 0), cell_size, f"cell{i},{j}", app, background_color=(60, 60, 60)))
+
+
+@benchmark("grid")
+def bench_grid():
+    """Setup, draw and pointer events of large grids."""
+    results = {}
+    shapes = [(shape, False, 1) for shape in GRID_SHAPES] + [(SPARSE_SHAPE, True, SPARSE_STEP)]
+    for shape, sparse, step in shapes:
+        label = f"{'sparse_' if sparse else ''}{shape[0]}x{shape[1]}"
+        app, state = make_app()
+
+        def setup():
+            grid = Grid((0, 0), (800, 600), "grid", app, shape, sparse=sparse, padding=1)
+            fill_grid(app, grid, step)
+            return grid
+        results[f"setup[{label}]"] = measure(setup, repeat=3)
+
+        grid = setup()
+        state.ui_context.add_widget(grid)
+        screen = app.screen
+
+        def frame():
+            state.update()
+            state.draw(screen)
+        frame()
+        results[f"frame[{label}]"] = measure(frame, repeat=5)
+        results[f"motion[{label}]"] = measure_sweep(grid.handle_event)
+        close_app(app)
+    return results
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import pygame
+from bazui.library import ImageLibrary
+from bazui.ui.image import Image
+from benchmarks.runner import benchmark, measure
+from benchmarks.helpers import make_app, close_app
+
+IMAGE_SIZE = (1024, 768)
+LOAD_COUNT = 32  # images decoded per library load run
+LOAD_SIZE = (512, 512)
+LOADER_WORKERS = (1, 2, 4)
+
+
+def make_image(size, seed=0)-> pygame.Surface:
+    """Return an image with enough detail for scaling and compression to do real work."""
+    image = pygame.Surface(size)
+    for x in range(0, size[0], 16):
+        for y in range(0, size[1], 16):
+            image.fill(((x * 7 + seed) % 256, (y * 5 + seed) % 256, (x + y) % 256), (x, y, 16, 16))
+    return image
+
+
+def resize_sizes():
+    """Endless sizes of a window being resized, never twice the same in a run."""
+    step = 0
+    while True:
+        step += 1
+        yield 300 + step % 500, 200 + step * 7 % 400
+
+
+@benchmark("image")
+def bench_image():
+    """Cost of Image.blit_image when the widget is resized, while the size changes and once it settled."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "image.png")
+        pygame.image.save(make_image(IMAGE_SIZE), path)
+        for mipmaps in (False, True):
+            app, state = make_app(image_mipmaps=mipmaps)
+            app.library.load_async([{"name": "image", "path": path}])[0].result()
+            suffix = "_mipmaps" if mipmaps else ""
+            for label, rescale_delay in (("resize_fast", float("inf")), ("resize_smooth", 0)):
+                widget = Image((0, 0), (400, 300), "image", app, "image", rescale_delay=rescale_delay)
+                sizes = resize_sizes()
+
+                def resize():
+                    widget.size = next(sizes)
+                    widget.blit_image(widget)
+                results[f"{label}{suffix}"] = measure(resize, repeat=5, number=10)
+            if not mipmaps:
+                results["same_size"] = measure(lambda: widget.blit_image(widget), repeat=5, number=50)
+            close_app(app)
+    return results
+
+
+@benchmark("library")
+def bench_library():
+    """ImageLibrary decoding throughput, as the time per loaded image."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        for i in range(LOAD_COUNT):
+            path = os.path.join(directory, f"image{i}.png")
+            pygame.image.save(make_image(LOAD_SIZE, i), path)
+            files.append({"name": f"image{i}", "path": path})
+        for workers in LOADER_WORKERS:
+            def load():
+                library = ImageLibrary(workers=workers)
+                for future in library.load_async(files):
+                    future.result()
+                library.close(wait=True)
+            results[f"load_png[{workers} workers]"] = measure(load, repeat=5) / LOAD_COUNT
+    return results
@@ -0,0 +1,59 @@
+import itertools
+import random
+import pygame
+from bazui.ui.text import SingleLineText
+from benchmarks.runner import benchmark, measure
+from benchmarks.helpers import make_app, close_app, key_down
+
+TEXT_LENGTHS = (100, 1000, 10000)
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit")
+
+
+def make_text(length):
+    rng = random.Random(length)
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)[:length]
+
+
+@benchmark("text")
+def bench_text():
+    """SingleLineText editing and cursor placement against the text length."""
+    results = {}
+    type_a, backspace = key_down(pygame.K_a, "a"), key_down(pygame.K_BACKSPACE)
+    for length in TEXT_LENGTHS:
+        text = make_text(length)
+        for chunked in (False, True):
+            app, state = make_app()
+            field = SingleLineText((0, 0), (800, 30), "field", app, text=text, editable=True, can_be_selected=True,
+                                   chunked_render=chunked)
+            state.ui_context.add_widget(field)
+            field.selected = True
+            field.cursor_pos = length // 2
+            suffix = "_chunked" if chunked else ""
+
+            def edit():
+                # typing then erasing a character in the middle of the text, with the frame drawing it
+                field.handle_event(type_a, is_under_parent=False)
+                field.handle_event(backspace, is_under_parent=False)
+                field.update()
+                field.draw(app.screen)
+            results[f"edit{suffix}[{length}]"] = measure(edit, repeat=5, number=max(1, 2000 // length))
+            # alternating two texts, setting the text a field already holds is not measured again
+            texts = itertools.cycle((text[::-1], text))
+            results[f"set_text{suffix}[{length}]"] = measure(lambda: field.set_text(next(texts)), repeat=5, number=4)
+
+            if not chunked:
+                rng = random.Random(0)
+                points = [(rng.randrange(800), 15) for _ in range(1000)]
+                scrolls = [rng.randrange(max(1, field.text_width - 800)) for _ in range(1000)]
+                index = itertools.count()
+
+                def place_cursor():
+                    i = next(index) % 1000
+                    field.scroll_x = scrolls[i]
+                    field.mouse_to_cursor(points[i])
+                results[f"mouse_to_cursor[{length}]"] = measure(place_cursor, repeat=5, number=100)
+            close_app(app)
+    return results
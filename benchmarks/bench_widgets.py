@@ -0,0 +1,76 @@
+import itertools
+import pygame
+from bazui.ui.widget import Widget
+from benchmarks.runner import benchmark, measure
+from benchmarks.helpers import make_app, close_app, measure_sweep, key_down
+
+WIDGET_COUNTS = (100, 1000, 5000)
+
+
+def add_panels(app, state, count):
+    """Add count top level panels, each holding a button, tiled over the screen."""
+    panels = []
+    for i in range(count):
+        pos = (i * 37 % 760, i * 23 % 560)
+        panel = Widget(pos, (40, 40), f"panel{i}", app, background_color=(40, 40, 40))
+        panel.set_child(Widget((pos[0] + 5, pos[1] + 5), (20, 20), "button", app, background_color=(80, 80, 200),
+                               on_click=lambda widget: None))
+        panels.append(panel)
+    state.ui_context.add_widgets(panels)
+    return panels
+
+
+@benchmark("frame")
+def bench_frame():
+    """Frame time (update and draw) against the number of widgets of the UIContext."""
+    results = {}
+    for count in WIDGET_COUNTS:
+        for dirty in (False, True):
+            app, state = make_app(dirty_rendering=dirty)
+            panels = add_panels(app, state, count)
+            screen = app.screen
+
+            def frame():
+                state.update()
+                state.draw(screen)
+            frame()
+            if dirty:
+                results[f"dirty_idle[{count}]"] = measure(frame, repeat=5, number=max(1, 1000 // count))
+                colors = itertools.count()
+
+                def frame_one_change():
+                    panels[0].background_color = (next(colors) % 256, 0, 0)
+                    frame()
+                results[f"dirty_one_change[{count}]"] = measure(frame_one_change, repeat=5, number=max(1, 1000 // count))
+            else:
+                results[f"full[{count}]"] = measure(frame, repeat=5, number=max(1, 1000 // count))
+            close_app(app)
+    return results
+
+
+@benchmark("dispatch")
+def bench_dispatch():
+    """Latency of one event through UIContext.handle_events and Widget.handle_event."""
+    results = {}
+    for count in WIDGET_COUNTS:
+        for indexed in (False, True):
+            app, state = make_app(spatial_index=indexed)
+            add_panels(app, state, count)
+            state.update()
+            label = "motion_indexed" if indexed else "motion"
+            results[f"{label}[{count}]"] = measure_sweep(state.ui_context.handle_events)
+            if not indexed:
+                key = key_down(pygame.K_a, "a")
+                results[f"key[{count}]"] = measure(lambda: state.ui_context.handle_events(key), repeat=5,
+                                                   number=max(1, 2000 // count))
+            close_app(app)
+
+        # a single widget holding every other one
+        app, state = make_app()
+        container = Widget((0, 0), (800, 600), "container", app)
+        for i in range(count):
+            container.set_child(Widget((i * 37 % 760, i * 23 % 560), (40, 40), f"child{i}", app))
+        state.ui_context.add_widget(container)
+        results[f"nested_motion[{count}]"] = measure_sweep(container.handle_event)
+        close_app(app)
+    return results
@@ -0,0 +1,55 @@
+import pygame
+from bazui.app import App
+from bazui.app_state import AppState
+from bazui.states.base_state import BaseState
+from benchmarks.runner import measure
+
+
+def make_app(**parameters):
+    """Create an App with an active state.
+
+    Args:
+        **parameters: AppState parameters (e.g. dirty_rendering=True).
+
+    Returns:
+        tuple[App, BaseState]: The app and its active state.
+    """
+
+    app_state = AppState()
+    for key, value in parameters.items():
+        if hasattr(app_state, key):
+            setattr(app_state, key, value)
+        else:
+            raise AttributeError(f"AppState has no attribute {key}")
+    app = App(app_state)
+    state = BaseState(app)
+    app.state_manager.add_state(state)
+    app.state_manager.set_active(0)
+    return app, state
+
+
+def close_app(app):
+    app.library.close(wait=True)
+
+
+def motion(pos):
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(1, 0), buttons=(0, 0, 0))
+
+
+def pointer_sweep()-> list:
+    """Return the motion events of the pointer crossing the screen horizontally."""
+    return [motion((x, 300)) for x in range(0, 800, 32)]
+
+
+def measure_sweep(handle_event, repeat=5)-> float:
+    """Return the time (s) taken by handle_event per event of a pointer sweep."""
+    events = pointer_sweep()
+
+    def sweep():
+        for event in events:
+            handle_event(event)
+    return measure(sweep, repeat) / len(events)
+
+
+def key_down(key, unicode=""):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode=unicode, scancode=0)
@@ -0,0 +1,122 @@
+import gc
+import json
+import platform
+import time
+from time import perf_counter
+import pygame
+
+BENCHMARKS = []  # (name, function) in registration order
+
+
+def benchmark(name):
+    """Register a benchmark. The function returns a dict of metric name -> seconds (lower is better)."""
+    def register(function):
+        BENCHMARKS.append((name, function))
+        return function
+    return register
+
+
+def measure(function, repeat=5, number=1)-> float:
+    """Return the time (s) of one call of a function, in the fastest of several runs. Like timeit,
+    the fastest run is kept, slower runs measure the noise of the machine rather than the code,
+    and the garbage collector is disabled during the runs.
+
+    Args:
+        function (callable): Called without arguments.
+        repeat (int, optional): Number of timed runs. Defaults to 5.
+        number (int, optional): Number of calls per run. Defaults to 1.
+
+    Returns:
+        float: The time of a call.
+    """
+
+    times = []
+    gc_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            start = perf_counter()
+            for _ in range(number):
+                function()
+            times.append((perf_counter() - start) / number)
+            if gc_enabled:
+                gc.enable()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return min(times)
+
+
+def run(selected=None, log=print)-> dict:
+    """Run the registered benchmarks.
+
+    Args:
+        selected (list[str], optional): Only run the benchmarks whose name starts with one of these. Defaults to None (all).
+        log (callable, optional): Called with progress messages. Defaults to print.
+
+    Returns:
+        dict: {"metadata": ..., "results": {metric: seconds}}.
+    """
+
+    results = {}
+    for name, function in BENCHMARKS:
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        start = perf_counter()
+        metrics = function()
+        for metric, seconds in metrics.items():
+            results[f"{name}.{metric}"] = seconds
+            log(f"{name}.{metric:<40} {format_time(seconds)}")
+        log(f"{name} done in {perf_counter() - start:.1f} s")
+    return {"metadata": metadata(), "results": results}
+
+
+def metadata()-> dict:
+    return {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "pygame": pygame.version.ver, "sdl": ".".join(map(str, pygame.get_sdl_version())),
+            "platform": platform.platform(), "machine": platform.machine()}
+
+
+def compare(results, baseline, tolerance=0.5, min_delta=1e-4)-> list[dict]:
+    """Compare results to a baseline.
+
+    Args:
+        results (dict): Metric name -> seconds.
+        baseline (dict): Metric name -> seconds.
+        tolerance (float, optional): Relative slowdown above which a metric regressed. Defaults to 0.5.
+        min_delta (float, optional): Absolute slowdown (s) under which a metric never regressed:
+            timings that short are mostly noise. Defaults to 1e-4.
+
+    Returns:
+        list[dict]: The compared metrics, with "metric", "baseline", "result", "ratio" and "regressed".
+    """
+
+    comparison = []
+    for metric, seconds in results.items():
+        reference = baseline.get(metric)
+        if reference is None:
+            continue
+        ratio = seconds / reference if reference > 0 else float("inf")
+        regressed = ratio > 1 + tolerance and seconds - reference > min_delta
+        comparison.append({"metric": metric, "baseline": reference, "result": seconds, "ratio": ratio,
+                           "regressed": regressed})
+    return comparison
+
+
+def format_time(seconds)-> str:
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def load(path)-> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save(data, path):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=1, sort_keys=True)
@@ -7,7 +7,7 @@ setup(
     author="Clément Lafond",
     author_email="clafond8@gmail.com",
     url="https://github.com/clementlaf/Bazui",  # Optional: link to your repo
-    packages=find_packages(),
+    packages=find_packages(exclude=("benchmarks", "benchmarks.*", "tests", "tests.*")),
     include_package_data=True,
     install_requires=[
         "pygame-ce==2.5.2",